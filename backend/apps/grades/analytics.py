@@ -0,0 +1,71 @@
+# backend/apps/grades/analytics.py
+import math
+
+from django.db.models import Max, Min, Sum
+
+# Roll-up dimension -> GradeAggregate columns it groups by, the first being
+# its key and the rest labels that depend on it.
+ANALYTICS_DIMENSIONS = {
+    'year_level': {'year_level': 'year_level'},
+    'section': {'section_id': 'section_id', 'section': 'section__name'},
+    'subject': {'subject_id': 'subject_id', 'subject_code': 'subject__code', 'subject_name': 'subject__name'},
+    'assessment_type': {'assessment_type': 'assessment_type'},
+    'assessment': {'assessment_id': 'assessment_id', 'assessment': 'assessment__name'},
+}
+
+
+def _statistics(count, score_sum, score_sq_sum, score_min, score_max, pass_count):
+    """Mean, standard deviation and pass rate from the additive measures."""
+    if not count:
+        return {'count': 0, 'mean': None, 'std': None, 'min': None, 'max': None, 'pass_rate': None}
+    mean = score_sum / count
+    variance = max(score_sq_sum / count - mean * mean, 0)
+    return {
+        'count': count,
+        'mean': round(mean, 2),
+        'std': round(math.sqrt(variance), 2),
+        'min': round(score_min, 2),
+        'max': round(score_max, 2),
+        'pass_rate': round(pass_count / count * 100, 2)
+    }
+
+
+def roll_up(aggregates, dimensions):
+    """
+    Roll GradeAggregate rows up to the given dimensions (any subset of
+    ANALYTICS_DIMENSIONS, none for a grand total) with one grouped query.
+    Counts, sums and sums of squares add up and min/max combine, so no raw
+    grade is read. Scores are percentages of each assessment's max_score.
+    """
+    columns = {
+        name: column
+        for dimension in dimensions
+        for name, column in ANALYTICS_DIMENSIONS[dimension].items()
+    }
+    measures = {
+        'total_count': Sum('count'),
+        'total_score_sum': Sum('score_sum'),
+        'total_score_sq_sum': Sum('score_sq_sum'),
+        'lowest': Min('score_min'),
+        'highest': Max('score_max'),
+        'total_pass_count': Sum('pass_count'),
+    }
+    if columns:
+        rows = aggregates.values(*columns.values()).annotate(**measures).order_by(*columns.values())
+    else:
+        rows = [aggregates.aggregate(**measures)]
+
+    return [
+        {
+            **{name: row[column] for name, column in columns.items()},
+            **_statistics(
+                row['total_count'],
+                row['total_score_sum'],
+                row['total_score_sq_sum'],
+                row['lowest'],
+                row['highest'],
+                row['total_pass_count']
+            )
+        }
+        for row in rows
+    ]
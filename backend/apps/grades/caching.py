@@ -0,0 +1,93 @@
+# backend/apps/grades/caching.py
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_STATS_KEY = 'grades:dashboard-stats'
+DASHBOARD_STATS_FRESH_FOR = 60
+DASHBOARD_STATS_STALE_FOR = 60 * 60
+
+REFRESH_LOCK_TIMEOUT = 30
+
+# Transcripts are dropped whenever their inputs change, so they can live long.
+TRANSCRIPT_TIMEOUT = 60 * 60 * 24
+
+
+def _store(key, value, fresh_for, stale_for):
+    cache.set(key, (value, time.time() + fresh_for), fresh_for + stale_for)
+
+
+def _refresh_in_background(key, compute, fresh_for, stale_for):
+    try:
+        _store(key, compute(), fresh_for, stale_for)
+    except Exception:
+        logger.exception('Background refresh of %s failed', key)
+    finally:
+        cache.delete(f'{key}:refreshing')
+        # This thread opened its own connection; don't leave it behind.
+        connection.close()
+
+
+def stale_while_revalidate(key, compute, fresh_for, stale_for):
+    """
+    Return the cached value for key, computing it on a miss.
+    For `fresh_for` seconds the value is served as is. After that, and for
+    up to `stale_for` more seconds, the stale value is still served while a
+    single background thread recomputes it.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        value = compute()
+        _store(key, value, fresh_for, stale_for)
+        return value
+
+    value, fresh_until = entry
+    if time.time() > fresh_until and cache.add(f'{key}:refreshing', True, REFRESH_LOCK_TIMEOUT):
+        threading.Thread(
+            target=_refresh_in_background,
+            args=(key, compute, fresh_for, stale_for),
+            daemon=True
+        ).start()
+    return value
+
+
+def invalidate_dashboard_stats():
+    """
+    Drop the cached dashboard statistics once the current transaction
+    commits, so a refresh running meanwhile cannot re-cache counts from
+    before the write.
+    """
+    transaction.on_commit(lambda: cache.delete(DASHBOARD_STATS_KEY))
+
+
+def get_many_cached(ids, key_for, compute_many, timeout):
+    """
+    Values for many ids with one cache round trip; the misses are computed
+    together by compute_many(missing_ids) -> {id: value} and stored.
+    """
+    keys = {key_for(pk): pk for pk in ids}
+    found = cache.get_many(list(keys))
+    values = {keys[key]: value for key, value in found.items()}
+
+    missing = [pk for key, pk in keys.items() if key not in found]
+    if missing:
+        computed = compute_many(missing)
+        cache.set_many({key_for(pk): computed[pk] for pk in missing}, timeout)
+        values.update(computed)
+    return values
+
+
+def transcript_key(student_id):
+    return f'grades:transcript:{student_id}'
+
+
+def invalidate_transcripts(student_ids):
+    """Drop cached transcripts once the current transaction commits."""
+    keys = [transcript_key(student_id) for student_id in set(student_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,82 @@
+# backend/apps/grades/calculations.py
+from decimal import Decimal
+
+ASSESSMENT_TYPES = ('activity', 'quiz', 'exam')
+
+DEFAULT_WEIGHTS = {
+    'activity': Decimal('30.00'),
+    'quiz': Decimal('30.00'),
+    'exam': Decimal('40.00'),
+}
+
+PASSING_GRADE = 75
+
+TWO_PLACES = Decimal('0.01')
+
+
+def subject_weights(grade_weight):
+    """Map a subject's GradeWeight (or None) to {assessment_type: weight}."""
+    if grade_weight is None:
+        return dict(DEFAULT_WEIGHTS)
+    return {
+        'activity': grade_weight.activity_weight,
+        'quiz': grade_weight.quiz_weight,
+        'exam': grade_weight.exam_weight,
+    }
+
+
+def weighted_final_grade(totals, weights):
+    """
+    Weighted final grade from per-category totals.
+    totals maps assessment_type to (score_total, max_total). Each category
+    contributes its percentage (score_total / max_total) times its weight;
+    categories without graded work are left out and the remaining weights
+    are rescaled. Returns None when no category can be graded.
+    """
+    weighted_sum = Decimal('0')
+    weight_sum = Decimal('0')
+
+    for assessment_type, (score_total, max_total) in totals.items():
+        weight = Decimal(weights.get(assessment_type) or 0)
+        if not max_total or not weight:
+            continue
+        weighted_sum += Decimal(score_total) / Decimal(max_total) * 100 * weight
+        weight_sum += weight
+
+    if not weight_sum:
+        return None
+    return (weighted_sum / weight_sum).quantize(TWO_PLACES)
+
+
+def get_grade_status(score, max_score=100):
+    """
+    Determine the grade status based on score and max_score.
+    If max_score is 100, it's already a percentage.
+    """
+    try:
+        if max_score != 100:
+            percentage = (float(score) / float(max_score)) * 100
+        else:
+            percentage = float(score)
+
+        if percentage >= 90:
+            return 'Excellent'
+        elif percentage >= 80:
+            return 'Good'
+        elif percentage >= PASSING_GRADE:
+            return 'Passing'
+        else:
+            return 'Needs Improvement'
+    except (TypeError, ValueError, ZeroDivisionError):
+        return 'N/A'
+    return 'Failed'
+
+
+def final_grade_summary(final_grade, graded=True):
+    """(final_grade, status) pair as reported by the grade endpoints."""
+    if not graded:
+        return 0, 'No grades yet'
+    if final_grade is None:
+        return 0, 'No valid grades'
+    final_grade = float(final_grade)
+    return final_grade, get_grade_status(final_grade, 100)
@@ -0,0 +1,63 @@
+# backend/apps/grades/curves.py
+import numpy as np
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from .distributions import describe
+
+CURVE_METHODS = (
+    ('add', 'Add points'),
+    ('scale', 'Scale to a target mean'),
+    ('zscore', 'Normalize to a target mean and standard deviation'),
+)
+
+# Largest value Grade.score (max_digits=5, decimal_places=2) can hold.
+MAX_STORED_SCORE = 999.99
+
+
+def load_assessment_scores(grades):
+    """(student_ids, scores) of a Grade queryset as NumPy arrays, in one query."""
+    rows = list(grades.order_by('student_id').values_list('student_id', Cast('score', FloatField())))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    data = np.array(rows, dtype=np.float64)
+    return data[:, 0].astype(np.int64), data[:, 1]
+
+
+def curve_scores(scores, method, max_score, points=0, target_mean=None, target_std=None, cap=True):
+    """
+    New scores for a whole assessment at once.
+    - add: every score plus `points`
+    - scale: scores multiplied so their mean becomes `target_mean`
+    - zscore: scores standardized and mapped to `target_mean` and
+      `target_std` (the current standard deviation by default)
+    Results are rounded to two places and kept within 0 and max_score
+    unless cap is False, in which case they are only kept within what a
+    grade can store; callers must reject scores above max_score then.
+    """
+    if not scores.size:
+        return scores.copy()
+
+    if method == 'add':
+        curved = scores + points
+    elif method == 'scale':
+        mean = scores.mean()
+        curved = scores * (target_mean / mean) if mean > 0 else scores.copy()
+    elif method == 'zscore':
+        mean, std = scores.mean(), scores.std()
+        spread = std if target_std is None else target_std
+        curved = target_mean + (scores - mean) / std * spread if std > 0 else np.full_like(scores, target_mean)
+    else:
+        raise ValueError(f'Unknown curve method: {method}')
+
+    return np.round(np.clip(curved, 0, max_score if cap else MAX_STORED_SCORE), 2)
+
+
+def curve_summary(scores, curved, max_score):
+    """Distribution of the scores before and after a curve, as percentages."""
+    scale = 100 / max_score if max_score > 0 else 0
+    return {
+        'before': describe(scores * scale),
+        'after': describe(curved * scale),
+        'changed': int(np.count_nonzero(scores != curved))
+    }
@@ -0,0 +1,105 @@
+# backend/apps/grades/distributions.py
+import numpy as np
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from .calculations import ASSESSMENT_TYPES, PASSING_GRADE
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+DEFAULT_BINS = 10
+
+
+def load_scores(grades):
+    """
+    Read (assessment_id, score) pairs of a Grade queryset into NumPy arrays
+    with one query. Scores are cast to float in the database so no Decimal
+    objects are built for large result sets.
+    """
+    rows = list(grades.values_list('assessment_id', Cast('score', FloatField())))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    data = np.array(rows, dtype=np.float64)
+    return data[:, 0].astype(np.int64), data[:, 1]
+
+
+def to_percentages(assessment_ids, scores, assessments):
+    """Scale raw scores to percentages of each assessment's max_score."""
+    ids = np.array([assessment.id for assessment in assessments], dtype=np.int64)
+    max_scores = np.array([float(assessment.max_score) for assessment in assessments], dtype=np.float64)
+    order = np.argsort(ids)
+    positions = order[np.searchsorted(ids, assessment_ids, sorter=order)]
+    maxima = max_scores[positions]
+    return np.divide(scores * 100, maxima, out=np.zeros_like(scores), where=maxima > 0), positions
+
+
+def describe(values, bins=DEFAULT_BINS, passing=PASSING_GRADE):
+    """Summary statistics, percentiles and a 0-100 histogram of percentage scores."""
+    counts, edges = np.histogram(values, bins=bins, range=(0, 100))
+    summary = {
+        'count': int(values.size),
+        'histogram': {
+            'edges': [round(float(edge), 2) for edge in edges],
+            'counts': counts.tolist()
+        }
+    }
+    if not values.size:
+        summary.update(
+            mean=None, median=None, std=None, min=None, max=None,
+            percentiles={f'p{p}': None for p in PERCENTILES}, pass_rate=None
+        )
+        return summary
+
+    percentiles = np.percentile(values, PERCENTILES)
+    summary.update(
+        mean=round(float(values.mean()), 2),
+        median=round(float(np.median(values)), 2),
+        std=round(float(values.std()), 2),
+        min=round(float(values.min()), 2),
+        max=round(float(values.max()), 2),
+        percentiles={f'p{p}': round(float(v), 2) for p, v in zip(PERCENTILES, percentiles)},
+        pass_rate=round(float(np.count_nonzero(values >= passing) / values.size * 100), 2)
+    )
+    return summary
+
+
+def assessment_statistics(grades, assessments, bins=DEFAULT_BINS):
+    """
+    Score distribution of a set of grades overall, per assessment_type and
+    per assessment, all on the percentage scale.
+    """
+    assessments = list(assessments)
+    assessment_ids, scores = load_scores(grades)
+    if assessments:
+        percentages, positions = to_percentages(assessment_ids, scores, assessments)
+    else:
+        percentages, positions = scores, np.empty(0, dtype=np.int64)
+
+    # Group rows by assessment once; each group is a contiguous slice.
+    order = np.argsort(positions, kind='stable')
+    sorted_percentages = percentages[order]
+    boundaries = np.searchsorted(positions[order], np.arange(len(assessments) + 1))
+
+    types = np.array([assessment.assessment_type for assessment in assessments])
+    row_types = types[positions] if assessments else np.empty(0, dtype=str)
+
+    per_assessment = []
+    for index, assessment in enumerate(assessments):
+        values = sorted_percentages[boundaries[index]:boundaries[index + 1]]
+        per_assessment.append({
+            'id': assessment.id,
+            'name': assessment.name,
+            'assessment_type': assessment.assessment_type,
+            'max_score': float(assessment.max_score),
+            'date': assessment.date,
+            **describe(values, bins)
+        })
+
+    return {
+        'overall': describe(percentages, bins),
+        'by_type': {
+            assessment_type: describe(percentages[row_types == assessment_type], bins)
+            for assessment_type in ASSESSMENT_TYPES
+        },
+        'assessments': per_assessment
+    }
@@ -0,0 +1,160 @@
+# backend/apps/grades/events.py
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from apps.students.models import Student
+
+DEFAULT_BROKER = 'apps.grades.events.InProcessBroker'
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+STREAM_TOKEN_SALT = 'apps.grades.events.stream'
+STREAM_TOKEN_MAX_AGE = 60
+
+
+class Subscription:
+    """Queue of event payloads for one connected client."""
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, payload):
+        # Runs on the subscriber's event loop.
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class InProcessBroker:
+    """
+    Fans grade events out to the subscribers of this process only.
+    Deployments with several processes can point GRADE_EVENTS_BROKER at a
+    class with the same publish/subscribe/unsubscribe interface backed by a
+    shared channel.
+    """
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, payload):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, payload)
+
+    def subscribe(self, channel):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, channel, subscription):
+        with self._lock:
+            self._subscribers[channel].discard(subscription)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, 'GRADE_EVENTS_BROKER', DEFAULT_BROKER))()
+
+
+def gradebook_channel(section_id, subject_id):
+    return f'gradebook:{section_id}:{subject_id}'
+
+
+def issue_stream_token(user, section_id, subject_id):
+    """
+    Signed token that only opens the event stream of one gradebook. It is
+    meant for EventSource, which cannot send an Authorization header, so
+    the access token never has to appear in a URL.
+    """
+    return signing.dumps(
+        {'user': user.pk, 'channel': gradebook_channel(section_id, subject_id)},
+        salt=STREAM_TOKEN_SALT,
+        compress=True
+    )
+
+
+def stream_token_user_id(token, section_id, subject_id):
+    """User id of a valid stream token for this gradebook, otherwise None."""
+    try:
+        data = signing.loads(token, salt=STREAM_TOKEN_SALT, max_age=STREAM_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if data.get('channel') != gradebook_channel(section_id, subject_id):
+        return None
+    return data.get('user')
+
+
+def publish_grade_changes(subject_id, changes):
+    """
+    Publish grade changes of one subject once the current transaction
+    commits. changes is a list of (student_id, assessment_id, score) with
+    score None for a deleted grade; they are grouped into one compact
+    event per section.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+
+    def publish():
+        sections = dict(Student.objects.filter(
+            pk__in={student_id for student_id, _, _ in changes}
+        ).values_list('id', 'section_id'))
+
+        by_section = defaultdict(list)
+        for student_id, assessment_id, score in changes:
+            section_id = sections.get(student_id)
+            if section_id is not None:
+                by_section[section_id].append([
+                    student_id,
+                    assessment_id,
+                    str(score) if score is not None else None
+                ])
+
+        broker = get_broker()
+        for section_id, rows in by_section.items():
+            broker.publish(
+                gradebook_channel(section_id, subject_id),
+                json.dumps({'subject': subject_id, 'grades': rows}, separators=(',', ':'))
+            )
+
+    transaction.on_commit(publish)
+
+
+async def event_stream(channel, heartbeat=15):
+    """Server-Sent Events for one gradebook channel, with keep-alive comments."""
+    broker = get_broker()
+    subscription = broker.subscribe(channel)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                payload = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+
+            if subscription.overflowed:
+                # The client fell behind; tell it to reload once instead.
+                subscription.overflowed = False
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                yield 'event: resync\ndata: {}\n\n'
+                continue
+
+            yield f'event: grades\ndata: {payload}\n\n'
+    finally:
+        broker.unsubscribe(channel, subscription)
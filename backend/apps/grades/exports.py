@@ -0,0 +1,223 @@
+# backend/apps/grades/exports.py
+import csv
+import zipfile
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+
+from .models import Grade
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Approximate amount of an export pulled per trip to the sync thread under ASGI.
+ASYNC_BATCH_SIZE = 64 * 1024
+
+EXPORT_COLUMNS = [
+    'Section', 'Student ID', 'Last Name', 'First Name', 'Subject Code',
+    'Assessment', 'Type', 'Date', 'Max Score', 'Score', 'Percentage',
+]
+
+
+def export_rows(grades):
+    """
+    Yield one row per grade, read from the database with a server-side
+    cursor in chunks so the full gradebook is never held in memory.
+    """
+    rows = grades.order_by(
+        'student__section__year_level',
+        'student__section__name',
+        'assessment__subject__code',
+        'student__last_name',
+        'student__first_name',
+        'assessment__date',
+        'assessment__name'
+    ).values_list(
+        'student__section__year_level',
+        'student__section__name',
+        'student__student_id',
+        'student__last_name',
+        'student__first_name',
+        'assessment__subject__code',
+        'assessment__name',
+        'assessment__assessment_type',
+        'assessment__date',
+        'assessment__max_score',
+        'score'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for (year_level, section, student_id, last_name, first_name, subject_code,
+         assessment, assessment_type, assessment_date, max_score, score) in rows:
+        percentage = round(score / max_score * 100, 2) if max_score else 0
+        yield [
+            f'{year_level}-{section}' if section else '',
+            student_id,
+            last_name,
+            first_name,
+            subject_code,
+            assessment,
+            assessment_type,
+            assessment_date.isoformat() if assessment_date else '',
+            max_score,
+            score,
+            percentage,
+        ]
+
+
+class Echo:
+    """Pseudo-buffer whose write() returns the value instead of storing it."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class StreamSink:
+    """Write-only, unseekable file object that collects bytes until drained."""
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Grades" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_cell(value):
+    if isinstance(value, (int, float)) or hasattr(value, 'as_tuple'):
+        return f'<c><v>{value}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_row(index, values):
+    return f'<row r="{index}">{"".join(_xlsx_cell(value) for value in values)}</row>'
+
+
+def stream_xlsx(rows, flush_every=500):
+    """
+    Minimal single-sheet XLSX writer. The package is deflated into an
+    unseekable sink and drained every `flush_every` rows, so bytes reach
+    the client while the query is still being read.
+    """
+    sink = StreamSink()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as package:
+        package.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        package.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        package.writestr('xl/workbook.xml', XLSX_WORKBOOK)
+        package.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+        yield sink.drain()
+
+        with package.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            sheet.write(_xlsx_row(1, EXPORT_COLUMNS).encode())
+            for index, row in enumerate(rows, start=2):
+                sheet.write(_xlsx_row(index, row).encode())
+                if index % flush_every == 0:
+                    yield sink.drain()
+            sheet.write(b'</sheetData></worksheet>')
+
+    yield sink.drain()
+
+
+def _take(chunks, size):
+    """The next chunks of an iterator, up to about `size` characters or bytes."""
+    batch, taken = [], 0
+    for chunk in chunks:
+        batch.append(chunk)
+        taken += len(chunk)
+        if taken >= size:
+            break
+    return batch
+
+
+async def iterate_async(chunks, batch_size=ASYNC_BATCH_SIZE):
+    """
+    Serve a sync export generator as an async iterator.
+    Under ASGI, StreamingHttpResponse buffers a sync iterator completely
+    before sending it; this pulls batches of chunks in the request's sync
+    thread instead, so the server-side cursor stays on one connection and
+    only one batch is held at a time.
+    """
+    chunks = iter(chunks)
+    next_batch = sync_to_async(_take, thread_sensitive=True)
+    while batch := await next_batch(chunks, batch_size):
+        for chunk in batch:
+            yield chunk
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv', 'csv'),
+    'xlsx': (
+        stream_xlsx,
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'xlsx'
+    ),
+}
+
+
+def section_grades(section_id, subject_id=None):
+    grades = Grade.objects.filter(student__section_id=section_id)
+    if subject_id:
+        grades = grades.filter(assessment__subject_id=subject_id)
+    return grades
+
+
+def year_level_grades(year_level, subject_id=None):
+    grades = Grade.objects.filter(student__section__year_level=year_level)
+    if subject_id:
+        grades = grades.filter(assessment__subject_id=subject_id)
+    return grades
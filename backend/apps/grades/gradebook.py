@@ -0,0 +1,187 @@
+# backend/apps/grades/gradebook.py
+from django.db.models import Exists, OuterRef, Sum
+
+from apps.students.models import Student
+from apps.subjects.models import Enrollment
+from .models import Assessment, FinalGrade, Grade, GradeChange
+
+
+def fetch_gradebook(section_id, subject, as_of=None, students=None, assessments=None):
+    """
+    Load everything needed for a section/subject gradebook in three queries:
+    active enrollments (with students), the subject's assessments and the
+    grades of the section's students for those assessments.
+    students (a page of Student rows) and assessments (a filtered queryset)
+    narrow the gradebook to a window; grades are then only read for it.
+    With as_of, scores are the ones in effect at that moment according to
+    the grade history.
+    Returns (students, assessments, scores) where scores is keyed by
+    (student_id, assessment_id).
+    """
+    grades = Grade.objects if as_of is None else GradeChange.objects.as_of(as_of).filter(score__isnull=False)
+    grades = grades.filter(assessment__subject=subject, student__section_id=section_id)
+
+    if students is None:
+        enrollments = Enrollment.objects.filter(
+            subject=subject,
+            student__section_id=section_id,
+            is_active=True
+        ).select_related('student').order_by('student__last_name', 'student__first_name')
+        students = [enrollment.student for enrollment in enrollments]
+    else:
+        grades = grades.filter(student_id__in=[student.id for student in students])
+
+    if assessments is None:
+        assessments = list(Assessment.objects.filter(subject=subject))
+    else:
+        assessments = list(assessments)
+        grades = grades.filter(assessment_id__in=[assessment.id for assessment in assessments])
+
+    grades = grades.values_list('student_id', 'assessment_id', 'score')
+    scores = {(student_id, assessment_id): score for student_id, assessment_id, score in grades}
+
+    return students, assessments, scores
+
+
+def gradebook_students(section_id, subject):
+    """Students of a section actively enrolled in the subject, for row paging."""
+    return Student.objects.filter(section_id=section_id).filter(Exists(Enrollment.objects.filter(
+        student_id=OuterRef('pk'),
+        subject=subject,
+        is_active=True
+    )))
+
+
+def gradebook_totals(subject, student_ids, as_of=None):
+    """
+    Total score per student over every assessment of the subject, and the
+    subject's max total, aggregated in the database so a column window
+    does not change them.
+    """
+    grades = Grade.objects if as_of is None else GradeChange.objects.as_of(as_of).filter(score__isnull=False)
+    totals = dict(grades.filter(
+        assessment__subject=subject,
+        student_id__in=student_ids
+    ).values('student_id').annotate(total=Sum('score')).order_by().values_list('student_id', 'total'))
+    max_total = Assessment.objects.filter(subject=subject).aggregate(total=Sum('max_score'))['total'] or 0
+    return totals, max_total
+
+
+def _average(total_score, max_total):
+    return round(float(total_score / max_total * 100), 2) if max_total > 0 else 0
+
+
+def pivot_gradebook(students, assessments, scores):
+    """Pivot the fetched rows into one gradebook row per student."""
+    max_total = sum(assessment.max_score for assessment in assessments)
+    gradebook_data = []
+
+    for student in students:
+        grade_dict = {}
+        total_score = 0
+
+        for assessment in assessments:
+            score = scores.get((student.id, assessment.id))
+            if score is not None:
+                grade_dict[assessment.name] = score
+                total_score += score
+            else:
+                grade_dict[assessment.name] = 0
+
+        gradebook_data.append({
+            'student_id': student.id,
+            'student_name': student.full_name,
+            'grades': grade_dict,
+            'total_score': total_score,
+            'average': _average(total_score, max_total)
+        })
+
+    return gradebook_data
+
+
+def columnar_gradebook(students, assessments, scores):
+    """
+    The gradebook as parallel arrays: an assessments header, a students
+    array and a scores matrix with one row per student and one column per
+    assessment, None where there is no grade. Names are sent once, and
+    assessments sharing a name stay distinct.
+    """
+    max_total = sum(assessment.max_score for assessment in assessments)
+    matrix, totals, averages = [], [], []
+    for student in students:
+        row = [scores.get((student.id, assessment.id)) for assessment in assessments]
+        total_score = sum(score for score in row if score is not None)
+        matrix.append([float(score) if score is not None else None for score in row])
+        totals.append(float(total_score))
+        averages.append(_average(total_score, max_total))
+
+    return {
+        'assessments': [
+            {
+                'id': assessment.id,
+                'name': assessment.name,
+                'assessment_type': assessment.assessment_type,
+                'max_score': float(assessment.max_score),
+                'date': assessment.date
+            }
+            for assessment in assessments
+        ],
+        'students': [
+            {'id': student.id, 'student_id': student.student_id, 'name': student.full_name}
+            for student in students
+        ],
+        'scores': matrix,
+        'total_score': totals,
+        'average': averages
+    }
+
+
+def build_gradebook(section_id, subject, as_of=None):
+    """Gradebook rows for a section and subject in a constant number of queries."""
+    return pivot_gradebook(*fetch_gradebook(section_id, subject, as_of))
+
+
+def build_student_row(student, subject_id):
+    """
+    One student's gradebook row, with the stored weighted final grade,
+    in three queries regardless of section size.
+    """
+    assessments = list(Assessment.objects.filter(subject_id=subject_id))
+    grades = Grade.objects.filter(
+        student=student,
+        assessment__subject_id=subject_id
+    ).values_list('assessment_id', 'score')
+    scores = {(student.id, assessment_id): score for assessment_id, score in grades}
+
+    row = pivot_gradebook([student], assessments, scores)[0]
+    final_grade = FinalGrade.objects.filter(
+        student=student,
+        subject_id=subject_id
+    ).values_list('final_grade', flat=True).first()
+    row['final_grade'] = float(final_grade) if final_grade is not None else None
+    return row
+
+
+def build_windowed_gradebook(section_id, subject, students=None, assessments=None, as_of=None, layout='rows'):
+    """
+    Gradebook limited to a page of students and/or a window of assessments.
+    Scores cover the window only, while totals and averages are aggregated
+    over all of the subject's assessments.
+    """
+    column_window = assessments is not None
+    students, assessments, scores = fetch_gradebook(section_id, subject, as_of, students, assessments)
+    data = (columnar_gradebook if layout == 'columnar' else pivot_gradebook)(students, assessments, scores)
+    if not column_window:
+        # Every assessment is visible, so the pivoted totals are complete.
+        return data
+
+    totals, max_total = gradebook_totals(subject, [student.id for student in students], as_of)
+    student_totals = [totals.get(student.id) or 0 for student in students]
+    if layout == 'columnar':
+        data['total_score'] = [float(total) for total in student_totals]
+        data['average'] = [_average(total, max_total) for total in student_totals]
+    else:
+        for row, total in zip(data, student_totals):
+            row['total_score'] = total
+            row['average'] = _average(total, max_total)
+    return data
@@ -0,0 +1,263 @@
+# backend/apps/grades/imports.py
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from apps.students.models import Student
+from .calculations import TWO_PLACES
+from .models import Assessment, Grade, GradeChange, Job
+from .writes import upsert_grades
+
+IMPORT_COLUMNS = {
+    'student id': 'student_id',
+    'subject code': 'subject',
+    'assessment': 'assessment',
+    'score': 'score',
+}
+REQUIRED_COLUMNS = ('student_id', 'assessment', 'score')
+
+# Rows read, looked up and written per batch.
+IMPORT_CHUNK_SIZE = 1000
+
+PREVIEW_LIMIT = 50
+
+PLAN_KINDS = ('new', 'changed', 'unchanged', 'invalid')
+
+# Stages of a grade import job, kept in its params.
+PREVIEW = 'preview'
+APPLY = 'apply'
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def read_rows(file):
+    """
+    Yield (line_number, row) from a binary CSV file one line at a time.
+    Headers are matched case-insensitively against the export columns;
+    only Student ID, Assessment and Score are required, and Subject Code
+    is read when present.
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        yield from _read_csv(csv.reader(text))
+    finally:
+        # Leave the underlying file open for the caller.
+        text.detach()
+
+
+def check_format(file):
+    """
+    Raise ImportFormatError when the header (or the first row) cannot be
+    read, so obviously wrong uploads are rejected before a job is queued.
+    """
+    rows = read_rows(file)
+    try:
+        next(rows, None)
+    finally:
+        rows.close()
+        file.seek(0)
+
+
+def _read_csv(reader):
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise ImportFormatError('The file is empty')
+    except UnicodeDecodeError:
+        raise ImportFormatError('The file must be UTF-8 encoded CSV')
+
+    positions = {}
+    for index, name in enumerate(header):
+        key = IMPORT_COLUMNS.get(name.strip().lower())
+        if key and key not in positions:
+            positions[key] = index
+    missing = [key for key in REQUIRED_COLUMNS if key not in positions]
+    if missing:
+        raise ImportFormatError(f"Missing columns: {', '.join(missing)}")
+
+    try:
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            yield reader.line_num, {
+                key: values[index].strip() if index < len(values) else ''
+                for key, index in positions.items()
+            }
+    except UnicodeDecodeError:
+        raise ImportFormatError(f'Line {reader.line_num + 1} is not valid UTF-8')
+
+
+def _batches(items, size=IMPORT_CHUNK_SIZE):
+    """Lists of up to size items, read lazily from any iterable."""
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def _parse_score(raw, max_score):
+    """(score, error) for a raw score cell."""
+    if not raw:
+        return None, 'Score is missing'
+    try:
+        score = Decimal(raw)
+    except InvalidOperation:
+        return None, f'Score "{raw}" is not a number'
+    if not score.is_finite():
+        return None, f'Score "{raw}" is not a number'
+    if score < 0:
+        return None, 'Score cannot be negative'
+    score = score.quantize(TWO_PLACES)
+    if score > max_score:
+        return None, f"Score ({score}) cannot exceed the assessment's maximum score ({max_score})"
+    return score, None
+
+
+def _row_key(row, default_subject):
+    return row['student_id'], row.get('subject') or default_subject or '', row['assessment']
+
+
+def _plan_batch(batch, default_subject, last_rows, assessments):
+    """
+    Classify one batch of rows as new, changed, unchanged or invalid.
+    Students and the batch's current grades are read with IN (...) queries;
+    assessments are cached in `assessments` by subject code across batches.
+    """
+    parsed = [
+        (line_number, *_row_key(row, default_subject), row['score'])
+        for line_number, row in batch
+    ]
+
+    students = dict(Student.objects.filter(
+        student_id__in={student_key for _, student_key, _, _, _ in parsed}
+    ).values_list('student_id', 'id'))
+
+    subjects = {subject for _, _, subject, _, _ in parsed} - assessments.keys()
+    for subject in subjects:
+        assessments[subject] = {}
+    candidates = Assessment.objects.filter(
+        subject__code__in=subjects
+    ).values_list('subject__code', 'name', 'id', 'subject_id', 'max_score')
+    for subject, name, assessment_id, subject_id, max_score in candidates:
+        assessments[subject].setdefault(name, []).append((assessment_id, subject_id, max_score))
+
+    plan = {kind: [] for kind in PLAN_KINDS}
+    valid = []
+    for line_number, student_key, subject, name, raw_score in parsed:
+        entry = {'row': line_number, 'student_id': student_key, 'subject': subject, 'assessment': name, 'score': raw_score}
+        matches = assessments[subject].get(name, [])
+        last_row = last_rows[(student_key, subject, name)]
+        error = None
+        if last_row != line_number:
+            error = f'Superseded by row {last_row}'
+        elif not student_key:
+            error = 'Student ID is missing'
+        elif student_key not in students:
+            error = f'Student {student_key} not found'
+        elif not subject:
+            error = 'Subject code is missing'
+        elif not matches:
+            error = f'Assessment "{name}" not found in subject {subject}'
+        elif len(matches) > 1:
+            error = f'Assessment name "{name}" is ambiguous in subject {subject}'
+
+        if error is None:
+            assessment_id, subject_id, max_score = matches[0]
+            entry['score'], error = _parse_score(raw_score, max_score)
+
+        if error:
+            plan['invalid'].append({**entry, 'error': error})
+        else:
+            valid.append({**entry, 'student': students[student_key], 'assessment_id': assessment_id, 'subject_id': subject_id})
+
+    current = {
+        (student, assessment_id): score
+        for student, assessment_id, score in Grade.objects.filter(
+            student_id__in={entry['student'] for entry in valid},
+            assessment_id__in={entry['assessment_id'] for entry in valid}
+        ).values_list('student_id', 'assessment_id', 'score')
+    }
+    for entry in valid:
+        key = (entry['student'], entry['assessment_id'])
+        if key not in current:
+            plan['new'].append(entry)
+        elif current[key] != entry['score']:
+            plan['changed'].append({**entry, 'current_score': current[key]})
+        else:
+            plan['unchanged'].append(entry)
+    return plan
+
+
+def plan_import(file, default_subject=None, write=None, progress=None, batch_size=IMPORT_CHUNK_SIZE):
+    """
+    Parse a grade CSV and diff it against the current grades, streaming it
+    in batches of batch_size rows from the reader so memory holds one batch
+    at a time. A first pass only records the last row of each student
+    and assessment: that row wins and earlier ones are reported superseded.
+    write(entries), when given, is called with the new and changed entries
+    of every batch; progress(rows_done, rows_total) after each batch.
+    Returns the number of rows, counts of new, changed, unchanged and
+    invalid entries, and the first few of each for review.
+    """
+    last_rows, total = {}, 0
+    for line_number, row in read_rows(file):
+        last_rows[_row_key(row, default_subject)] = line_number
+        total += 1
+    file.seek(0)
+
+    summary = {
+        'rows': total,
+        'counts': dict.fromkeys(PLAN_KINDS, 0),
+        'preview': {kind: [] for kind in PLAN_KINDS}
+    }
+    assessments, done = {}, 0
+    for batch in _batches(read_rows(file), batch_size):
+        plan = _plan_batch(batch, default_subject, last_rows, assessments)
+        for kind, entries in plan.items():
+            summary['counts'][kind] += len(entries)
+            preview = summary['preview'][kind]
+            preview.extend(entries[:PREVIEW_LIMIT - len(preview)])
+
+        writes = plan['new'] + plan['changed']
+        if write is not None and writes:
+            write(writes)
+        done += len(batch)
+        if progress is not None:
+            progress(done, total)
+    return summary
+
+
+def preview_import(job, report_progress):
+    """Background task diffing an uploaded file; the summary is the job's result."""
+    with job.file.open('rb') as file:
+        return plan_import(file, job.params.get('subject'), progress=report_progress)
+
+
+def run_import(job, report_progress):
+    """
+    Background task applying an import: the file is diffed again so the
+    writes reflect grades changed since the preview, and the new and
+    changed rows of each batch are upserted in their own transaction.
+    """
+    def write(entries):
+        upsert_grades(
+            [Grade(student_id=entry['student'], assessment_id=entry['assessment_id'], score=entry['score']) for entry in entries],
+            {entry['assessment_id']: entry['subject_id'] for entry in entries},
+            GradeChange.IMPORT
+        )
+
+    with job.file.open('rb') as file:
+        summary = plan_import(file, job.params.get('subject'), write=write, progress=report_progress)
+
+    job.file.delete(save=False)
+    Job.objects.filter(pk=job.pk).update(file='')
+    counts = summary['counts']
+    return {
+        'created': counts['new'],
+        'updated': counts['changed'],
+        'unchanged': counts['unchanged'],
+        'invalid': counts['invalid'],
+        'invalid_rows': summary['preview']['invalid']
+    }
@@ -0,0 +1,52 @@
+# backend/apps/grades/jobs.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'GRADE_JOB_WORKERS', 2),
+    thread_name_prefix='grades-job'
+)
+
+
+def submit_job(job, task):
+    """
+    Queue task(job, report_progress) on the background pool once the
+    current transaction commits. Jobs run inside the web process, so a
+    restart while one is running leaves it marked as running.
+    """
+    Job.objects.filter(pk=job.pk).update(status=Job.QUEUED)
+    job.status = Job.QUEUED
+    transaction.on_commit(lambda: _executor.submit(_run, job.pk, task))
+
+
+def _run(job_id, task):
+    try:
+        job = Job.objects.get(pk=job_id)
+        job.status = Job.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+
+        def report_progress(processed, total=None):
+            fields = {'processed': processed}
+            if total is not None:
+                fields['total'] = total
+            Job.objects.filter(pk=job_id).update(**fields)
+
+        try:
+            result = task(job, report_progress)
+        except Exception as e:
+            logger.exception('Job %s failed', job_id)
+            Job.objects.filter(pk=job_id).update(status=Job.FAILED, error=str(e), finished_at=timezone.now())
+        else:
+            Job.objects.filter(pk=job_id).update(status=Job.SUCCEEDED, result=result, finished_at=timezone.now())
+    finally:
+        # Pool threads open their own connections; don't leave them behind.
+        connection.close()
@@ -0,0 +1,82 @@
+# backend/apps/grades/management/commands/benchmark_gradebook.py
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.grades.gradebook import build_gradebook
+from apps.grades.models import Assessment, Grade
+from apps.students.models import Section, Student
+from apps.subjects.models import Enrollment, Subject
+
+
+class Command(BaseCommand):
+    help = 'Measure gradebook query count and build time for synthetic sections of growing size'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='10x5,50x40,200x80',
+            help='Comma-separated STUDENTSxASSESSMENTS pairs to benchmark'
+        )
+
+    def handle(self, *args, **options):
+        sizes = [tuple(int(n) for n in size.split('x')) for size in options['sizes'].split(',')]
+
+        self.stdout.write(f"{'students':>9} {'assessments':>12} {'cells':>8} {'queries':>8} {'ms':>9}")
+        for index, (student_count, assessment_count) in enumerate(sizes):
+            # Everything is created inside a transaction that is rolled back,
+            # so the benchmark never leaves data behind.
+            with transaction.atomic():
+                section, subject = self._populate(index, student_count, assessment_count)
+
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    build_gradebook(section.id, subject)
+                    elapsed = (time.perf_counter() - started) * 1000
+
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{student_count:>9} {assessment_count:>12} {student_count * assessment_count:>8} "
+                f"{len(queries):>8} {elapsed:>9.1f}"
+            )
+
+    def _populate(self, index, student_count, assessment_count):
+        tag = f'BG{index}'
+        section = Section.objects.create(name='99', year_level=1)
+        subject = Subject.objects.create(code=f'{tag}-SUBJ', name='Benchmark', units=3, year_level=1)
+
+        students = Student.objects.bulk_create([
+            Student(
+                student_id=f'{tag}-{n:05d}',
+                first_name=f'First{n}',
+                last_name=f'Last{n}',
+                email=f'{tag.lower()}-{n}@benchmark.invalid',
+                date_of_birth=date(2000, 1, 1),
+                section=section
+            )
+            for n in range(student_count)
+        ])
+        Enrollment.objects.bulk_create([Enrollment(student=student, subject=subject) for student in students])
+
+        types = [choice for choice, _ in Assessment.TYPES]
+        assessments = Assessment.objects.bulk_create([
+            Assessment(
+                name=f'Assessment {n}',
+                subject=subject,
+                assessment_type=types[n % len(types)],
+                max_score=Decimal('100')
+            )
+            for n in range(assessment_count)
+        ])
+        Grade.objects.bulk_create([
+            Grade(student=student, assessment=assessment, score=Decimal((s + a) % 101))
+            for s, student in enumerate(students)
+            for a, assessment in enumerate(assessments)
+        ])
+
+        return section, subject
@@ -0,0 +1,41 @@
+# backend/apps/grades/management/commands/generate_report_cards.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.grades.rendering import REPORT_CARD_FORMATS
+from apps.grades.report_cards import generate_report_cards, report_card_students
+
+
+class Command(BaseCommand):
+    help = 'Render report cards for a section, a year level or every student into a zip under MEDIA_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', type=int, help='Only students of this section ID')
+        parser.add_argument('--year-level', type=int, help='Only students of this year level')
+        parser.add_argument(
+            '--format',
+            default='html',
+            help=f"Comma-separated formats: {', '.join(REPORT_CARD_FORMATS)}"
+        )
+        parser.add_argument('--workers', type=int, help='Worker processes (defaults to the CPU count)')
+        parser.add_argument('--output', help='Archive file name inside MEDIA_ROOT/report_cards/')
+
+    def handle(self, *args, **options):
+        formats = sorted({f.strip() for f in options['format'].split(',') if f.strip()})
+        unknown = set(formats) - set(REPORT_CARD_FORMATS)
+        if not formats or unknown:
+            raise CommandError(f"Formats must be among: {', '.join(REPORT_CARD_FORMATS)}")
+
+        filename = options['output'] or f"report-cards-{timezone.now():%Y%m%d-%H%M%S}.zip"
+        result = generate_report_cards(
+            report_card_students(options['section'], options['year_level']),
+            formats,
+            filename,
+            workers=options['workers'],
+            progress=lambda processed, total: self.stdout.write(f'{processed}/{total} students', ending='\r')
+        )
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {result['students']} report cards to {result['file']} in {result['seconds']}s "
+            f"({result['students_per_second']} students/s)"
+        ))
@@ -0,0 +1,64 @@
+# backend/apps/grades/management/commands/rebuild_final_grades.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.grades.models import FinalGrade
+from apps.subjects.models import Subject
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored final grades from raw grades, or verify them with --verify'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Compare stored rows with freshly computed ones without writing anything'
+        )
+        parser.add_argument(
+            '--subject',
+            type=int,
+            action='append',
+            help='Limit to this subject ID (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        subject_ids = options['subject'] or list(Subject.objects.values_list('id', flat=True))
+
+        if options['verify']:
+            mismatches = sum(self._verify(subject_id) for subject_id in subject_ids)
+            if mismatches:
+                self.stdout.write(self.style.ERROR(f'{mismatches} final grade rows are out of date'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'Final grades match for {len(subject_ids)} subjects'))
+            return
+
+        rebuilt = 0
+        for subject_id in subject_ids:
+            with transaction.atomic():
+                rebuilt += len(FinalGrade.objects.refresh(subject_id))
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rebuilt} final grade rows for {len(subject_ids)} subjects'
+        ))
+
+    def _verify(self, subject_id):
+        stored = {
+            row.student_id: row
+            for row in FinalGrade.objects.filter(subject_id=subject_id)
+        }
+
+        # Compute the expected rows with the rebuild logic, then roll back.
+        with transaction.atomic():
+            expected = {row.student_id: row for row in FinalGrade.objects.refresh(subject_id)}
+            transaction.set_rollback(True)
+
+        mismatches = 0
+        compared = FinalGrade.TOTAL_FIELDS + ['final_grade']
+        for student_id in stored.keys() | expected.keys():
+            current, fresh = stored.get(student_id), expected.get(student_id)
+            if current is None or fresh is None or any(
+                getattr(current, field) != getattr(fresh, field) for field in compared
+            ):
+                mismatches += 1
+                self.stdout.write(f'  subject {subject_id}, student {student_id}: out of date')
+        return mismatches
@@ -0,0 +1,29 @@
+# backend/apps/grades/management/commands/rebuild_grade_aggregates.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.grades.models import Assessment, GradeAggregate
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed grade analytics from raw grades'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--subject',
+            type=int,
+            action='append',
+            help='Limit to this subject ID (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        if options['subject']:
+            assessment_ids = list(Assessment.objects.filter(
+                subject_id__in=options['subject']
+            ).values_list('id', flat=True))
+        else:
+            assessment_ids = None
+
+        with transaction.atomic():
+            rebuilt = len(GradeAggregate.objects.refresh(assessment_ids))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} grade aggregate rows'))
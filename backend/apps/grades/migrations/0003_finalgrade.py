@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0002_alter_assessment_options_and_more'),
+        ('students', '0004_alter_student_options_alter_student_email_and_more'),
+        ('subjects', '0004_alter_enrollment_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinalGrade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity_score', models.DecimalField(decimal_places=2, default=0, max_digits=9)),
+                ('activity_max', models.DecimalField(decimal_places=2, default=0, max_digits=9)),
+                ('quiz_score', models.DecimalField(decimal_places=2, default=0, max_digits=9)),
+                ('quiz_max', models.DecimalField(decimal_places=2, default=0, max_digits=9)),
+                ('exam_score', models.DecimalField(decimal_places=2, default=0, max_digits=9)),
+                ('exam_max', models.DecimalField(decimal_places=2, default=0, max_digits=9)),
+                ('final_grade', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_grades', to='students.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_grades', to='subjects.subject')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('student', 'subject'), name='unique_final_grade')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0003_finalgrade'),
+        ('subjects', '0004_alter_enrollment_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assessment',
+            index=models.Index(fields=['subject', 'assessment_type', 'date'], name='assessment_subj_type_date_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0004_assessment_assessment_subj_type_date_idx'),
+        ('students', '0004_alter_student_options_alter_student_email_and_more'),
+        ('subjects', '0004_alter_enrollment_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='finalgrade',
+            index=models.Index(fields=['subject', 'final_grade'], name='final_grade_subject_grade_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def snapshot_existing_grades(apps, schema_editor):
+    """Start the history of existing grades at their last update."""
+    Grade = apps.get_model('grades', 'Grade')
+    GradeChange = apps.get_model('grades', 'GradeChange')
+    batch = []
+    grades = Grade.objects.values_list('student_id', 'assessment_id', 'score', 'updated_at')
+    for student_id, assessment_id, score, updated_at in grades.iterator(chunk_size=2000):
+        batch.append(GradeChange(
+            student_id=student_id,
+            assessment_id=assessment_id,
+            score=score,
+            source='initial',
+            changed_at=updated_at
+        ))
+        if len(batch) >= 2000:
+            GradeChange.objects.bulk_create(batch)
+            batch = []
+    GradeChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0005_finalgrade_final_grade_subject_grade_idx'),
+        ('students', '0004_alter_student_options_alter_student_email_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.DecimalField(blank=True, decimal_places=2, help_text='None when the grade was deleted', max_digits=5, null=True)),
+                ('source', models.CharField(choices=[('initial', 'Initial snapshot'), ('single', 'Single update'), ('bulk', 'Bulk update'), ('import', 'Import')], max_length=10)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('assessment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_changes', to='grades.assessment')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_changes', to='students.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['assessment', 'student', 'changed_at'], name='grade_change_asof_idx')],
+            },
+        ),
+        migrations.RunPython(snapshot_existing_grades, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:56
+
+import logging
+
+from django.db import migrations, models
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def clamp_negative_scores(apps, schema_editor):
+    """
+    Existing rows must satisfy the constraint before it is added, so
+    negative scores become 0. Each correction is recorded in the grade
+    history with the 'migration' source and the total is logged; stored
+    final grades are brought up to date by rebuild_final_grades.
+    """
+    Grade = apps.get_model('grades', 'Grade')
+    GradeChange = apps.get_model('grades', 'GradeChange')
+    negative = list(Grade.objects.filter(score__lt=0).values_list('id', 'student_id', 'assessment_id', 'score'))
+    if not negative:
+        return
+
+    now = timezone.now()
+    Grade.objects.filter(id__in=[grade_id for grade_id, _, _, _ in negative]).update(score=0, updated_at=now)
+    GradeChange.objects.bulk_create([
+        GradeChange(student_id=student_id, assessment_id=assessment_id, score=0, source='migration', changed_at=now)
+        for _, student_id, assessment_id, _ in negative
+    ], batch_size=2000)
+
+    logger.warning('Set %d negative grade scores to 0; see grade history with source "migration".', len(negative))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0006_gradechange'),
+        ('students', '0004_alter_student_options_alter_student_email_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_negative_scores, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='grade',
+            constraint=models.CheckConstraint(condition=models.Q(('score__gte', 0)), name='grade_score_non_negative'),
+        ),
+    ]
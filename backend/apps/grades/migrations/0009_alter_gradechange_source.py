@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0008_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gradechange',
+            name='source',
+            field=models.CharField(choices=[('initial', 'Initial snapshot'), ('single', 'Single update'), ('bulk', 'Bulk update'), ('import', 'Import'), ('curve', 'Curve')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0009_alter_gradechange_source'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('grade_import', 'Grade import'), ('report_cards', 'Report cards')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0010_alter_job_kind'),
+        ('students', '0004_alter_student_options_alter_student_email_and_more'),
+        ('subjects', '0004_alter_enrollment_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='finalgrade',
+            index=models.Index(condition=models.Q(('final_grade__lt', 75)), fields=['final_grade', 'student'], name='final_grade_at_risk_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0011_finalgrade_final_grade_at_risk_idx'),
+        ('students', '0004_alter_student_options_alter_student_email_and_more'),
+        ('subjects', '0004_alter_enrollment_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year_level', models.IntegerField()),
+                ('assessment_type', models.CharField(choices=[('activity', 'Activity'), ('quiz', 'Quiz'), ('exam', 'Exam')], max_length=10)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('score_sq_sum', models.FloatField(default=0)),
+                ('score_min', models.FloatField(blank=True, null=True)),
+                ('score_max', models.FloatField(blank=True, null=True)),
+                ('pass_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('assessment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_aggregates', to='grades.assessment')),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_aggregates', to='students.section')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_aggregates', to='subjects.subject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year_level', 'subject', 'assessment_type'], name='grade_agg_level_subject_idx'), models.Index(fields=['subject', 'assessment_type'], name='grade_agg_subject_type_idx')],
+                'constraints': [models.UniqueConstraint(fields=('section', 'assessment'), name='unique_grade_aggregate')],
+            },
+        ),
+    ]
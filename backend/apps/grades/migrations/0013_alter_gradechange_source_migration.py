@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0012_gradeaggregate'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gradechange',
+            name='source',
+            field=models.CharField(choices=[('initial', 'Initial snapshot'), ('single', 'Single update'), ('bulk', 'Bulk update'), ('import', 'Import'), ('curve', 'Curve'), ('migration', 'Data migration')], max_length=10),
+        ),
+    ]
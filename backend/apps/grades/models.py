@@ -1,7 +1,15 @@
 # backend/apps/grades/models.py
-from django.db import models
-from apps.students.models import Student
-from apps.subjects.models import Subject
+from collections import defaultdict
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Case, Count, Exists, F, FloatField, Max, Min, OuterRef, Q, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+from apps.students.models import Section, Student
+from apps.subjects.models import Subject, GradeWeight
+from .caching import invalidate_transcripts
+from .calculations import ASSESSMENT_TYPES, PASSING_GRADE, subject_weights, weighted_final_grade
 
 
 class Assessment(models.Model):
@@ -20,10 +28,33 @@ class Assessment(models.Model):
 
     class Meta:
         ordering = ['date', 'name']
+        indexes = [
+            models.Index(fields=['subject', 'assessment_type', 'date'], name='assessment_subj_type_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_assessment_type_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so saves can tell whether the grading
+        # inputs of existing grades changed.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+class GradeQuerySet(models.QuerySet):
+    def category_totals(self):
+        """Score and max score sums per student, subject and assessment type."""
+        return self.values(
+            'student_id',
+            'assessment__subject_id',
+            'assessment__assessment_type'
+        ).annotate(
+            score_total=Sum('score'),
+            max_total=Sum('assessment__max_score')
+        ).order_by()
+
 class Grade(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     assessment = models.ForeignKey(Assessment, on_delete=models.CASCADE)
@@ -32,8 +63,13 @@ class Grade(models.Model):
     date_recorded = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = GradeQuerySet.as_manager()
+
     class Meta:
         unique_together = ['student', 'assessment']
+        constraints = [
+            models.CheckConstraint(condition=Q(score__gte=0), name='grade_score_non_negative')
+        ]
 
     def __str__(self):
         return f"{self.student.full_name} - {self.assessment.name}: {self.score}"
@@ -42,3 +78,357 @@ class Grade(models.Model):
     def percentage(self):
         return (self.score / self.assessment.max_score) * 100 if self.assessment.max_score > 0 else 0
 
+
+class FinalGradeManager(models.Manager):
+    def refresh(self, subject_id, student_ids=None):
+        """
+        Recompute the stored totals of one subject, optionally limited to
+        some students, from a single grouped query over their grades.
+        The students' rows are locked first, so concurrent refreshes for the
+        same student wait for each other and the last one to run reads every
+        committed grade.
+        """
+        with transaction.atomic():
+            grades = Grade.objects.filter(assessment__subject_id=subject_id)
+            stale = self.filter(subject_id=subject_id)
+            if student_ids is not None:
+                grades = grades.filter(student_id__in=student_ids)
+                stale = stale.filter(student_id__in=student_ids)
+                locked = Student.objects.filter(pk__in=student_ids)
+            else:
+                locked = Student.objects.filter(
+                    Q(pk__in=grades.values('student_id')) | Q(pk__in=stale.values('student_id'))
+                )
+            list(locked.select_for_update().order_by('pk').values_list('pk', flat=True))
+
+            totals = defaultdict(dict)
+            for row in grades.category_totals():
+                totals[row['student_id']][row['assessment__assessment_type']] = (
+                    row['score_total'], row['max_total']
+                )
+
+            weights = subject_weights(GradeWeight.objects.filter(subject_id=subject_id).first())
+            rows = [
+                FinalGrade.from_totals(student_id, subject_id, student_totals, weights)
+                for student_id, student_totals in totals.items()
+            ]
+
+            if student_ids is None:
+                student_ids = set(stale.values_list('student_id', flat=True)) | set(totals)
+
+            # Students whose last grade in the subject is gone lose their row.
+            stale.exclude(student_id__in=list(totals)).delete()
+            self.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['student', 'subject'],
+                update_fields=FinalGrade.TOTAL_FIELDS + ['final_grade', 'updated_at']
+            )
+        invalidate_transcripts(student_ids)
+        return rows
+
+    def reweight(self, subject_id):
+        """Recompute final grades of a subject from the stored totals only."""
+        weights = subject_weights(GradeWeight.objects.filter(subject_id=subject_id).first())
+        rows = list(self.filter(subject_id=subject_id))
+        for row in rows:
+            row.final_grade = weighted_final_grade(row.totals, weights)
+        self.bulk_update(rows, ['final_grade'], batch_size=500)
+        invalidate_transcripts(row.student_id for row in rows)
+        return rows
+
+class FinalGrade(models.Model):
+    """Per-category totals and weighted final grade of a student in a subject."""
+    TOTAL_FIELDS = [
+        f'{assessment_type}_{part}'
+        for assessment_type in ASSESSMENT_TYPES
+        for part in ('score', 'max')
+    ]
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='final_grades')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='final_grades')
+    activity_score = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    activity_max = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    quiz_score = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    quiz_max = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    exam_score = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    exam_max = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    final_grade = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = FinalGradeManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'subject'], name='unique_final_grade')
+        ]
+        indexes = [
+            models.Index(fields=['subject', 'final_grade'], name='final_grade_subject_grade_idx'),
+            # Only failing rows: small, and usable for any threshold up to
+            # the passing grade.
+            models.Index(
+                fields=['final_grade', 'student'],
+                condition=Q(final_grade__lt=PASSING_GRADE),
+                name='final_grade_at_risk_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.student.full_name} - {self.subject.code}: {self.final_grade}"
+
+    @classmethod
+    def from_totals(cls, student_id, subject_id, totals, weights):
+        row = cls(student_id=student_id, subject_id=subject_id)
+        for assessment_type, (score_total, max_total) in totals.items():
+            setattr(row, f'{assessment_type}_score', score_total or 0)
+            setattr(row, f'{assessment_type}_max', max_total or 0)
+        row.final_grade = weighted_final_grade(row.totals, weights)
+        return row
+
+    @property
+    def totals(self):
+        return {
+            assessment_type: (
+                getattr(self, f'{assessment_type}_score'),
+                getattr(self, f'{assessment_type}_max')
+            )
+            for assessment_type in ASSESSMENT_TYPES
+        }
+
+
+class GradeChangeQuerySet(models.QuerySet):
+    def record(self, changes, source, changed_at=None):
+        """
+        Append one history row per (student_id, assessment_id, score) with a
+        single batched insert; score None records a deleted grade.
+        """
+        changed_at = changed_at or timezone.now()
+        return self.bulk_create([
+            GradeChange(
+                student_id=student_id,
+                assessment_id=assessment_id,
+                score=score,
+                source=source,
+                changed_at=changed_at
+            )
+            for student_id, assessment_id, score in changes
+        ], batch_size=1000)
+
+    def as_of(self, moment):
+        """
+        The change in effect at `moment` for every student and assessment:
+        the latest one at or before it, found by an anti-join on the
+        (assessment, student, changed_at) index. Rows with a None score are
+        grades that had been deleted by then.
+        """
+        later = GradeChange.objects.filter(
+            assessment_id=OuterRef('assessment_id'),
+            student_id=OuterRef('student_id'),
+            changed_at__lte=moment
+        ).filter(
+            Q(changed_at__gt=OuterRef('changed_at'))
+            | Q(changed_at=OuterRef('changed_at'), pk__gt=OuterRef('pk'))
+        )
+        return self.filter(changed_at__lte=moment).filter(~Exists(later))
+
+class GradeChange(models.Model):
+    """Append-only history of grade writes."""
+    INITIAL = 'initial'
+    SINGLE = 'single'
+    BULK = 'bulk'
+    IMPORT = 'import'
+    CURVE = 'curve'
+    MIGRATION = 'migration'
+    SOURCES = (
+        (INITIAL, 'Initial snapshot'),
+        (SINGLE, 'Single update'),
+        (BULK, 'Bulk update'),
+        (IMPORT, 'Import'),
+        (CURVE, 'Curve'),
+        (MIGRATION, 'Data migration'),
+    )
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='grade_changes')
+    assessment = models.ForeignKey(Assessment, on_delete=models.CASCADE, related_name='grade_changes')
+    score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="None when the grade was deleted")
+    source = models.CharField(max_length=10, choices=SOURCES)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    objects = GradeChangeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['assessment', 'student', 'changed_at'], name='grade_change_asof_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.assessment_id}: {self.score} at {self.changed_at}"
+
+
+class Job(models.Model):
+    """A long-running task executed outside the request, with its progress."""
+    GRADE_IMPORT = 'grade_import'
+    REPORT_CARDS = 'report_cards'
+    KINDS = (
+        (GRADE_IMPORT, 'Grade import'),
+        (REPORT_CARDS, 'Report cards'),
+    )
+
+    PENDING = 'pending'
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    params = models.JSONField(default=dict, blank=True)
+    file = models.FileField(upload_to='jobs/', blank=True)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        return round(self.processed / self.total * 100, 2) if self.total else 0
+
+
+class GradeAggregateManager(models.Manager):
+    def refresh(self, assessment_ids=None, section_ids=None):
+        """
+        Recompute the aggregates of some assessments and/or sections (all of
+        them when neither is given) with one grouped query over their
+        grades, then upsert the groups and drop the ones left empty.
+        Students without a section are not part of the cube.
+        The affected assessments are locked first, so concurrent refreshes
+        of the same cells wait for each other and the last one to run reads
+        every committed grade.
+        """
+        with transaction.atomic():
+            grades = Grade.objects.filter(student__section__isnull=False)
+            existing = self.all()
+            if assessment_ids is not None:
+                grades = grades.filter(assessment_id__in=assessment_ids)
+                existing = existing.filter(assessment_id__in=assessment_ids)
+            if section_ids is not None:
+                grades = grades.filter(student__section_id__in=section_ids)
+                existing = existing.filter(section_id__in=section_ids)
+            if assessment_ids is not None:
+                locked = Assessment.objects.filter(pk__in=assessment_ids)
+            elif section_ids is not None:
+                locked = Assessment.objects.filter(
+                    Q(pk__in=grades.values('assessment_id')) | Q(pk__in=existing.values('assessment_id'))
+                )
+            else:
+                locked = Assessment.objects.all()
+            list(locked.select_for_update().order_by('pk').values_list('pk', flat=True))
+
+            # Same scale as Grade.percentage, 0 for an assessment without points.
+            percentage = Case(
+                When(
+                    assessment__max_score__gt=0,
+                    then=Cast('score', FloatField()) * 100 / Cast('assessment__max_score', FloatField())
+                ),
+                default=Value(0.0),
+                output_field=FloatField()
+            )
+            groups = grades.annotate(percentage=percentage).values(
+                'student__section_id',
+                'student__section__year_level',
+                'assessment_id',
+                'assessment__subject_id',
+                'assessment__assessment_type'
+            ).annotate(
+                count=Count('id'),
+                score_sum=Sum('percentage'),
+                score_sq_sum=Sum(F('percentage') * F('percentage')),
+                score_min=Min('percentage'),
+                score_max=Max('percentage'),
+                pass_count=Count('id', filter=Q(percentage__gte=PASSING_GRADE))
+            ).order_by()
+
+            rows = [
+                GradeAggregate(
+                    section_id=group['student__section_id'],
+                    year_level=group['student__section__year_level'],
+                    subject_id=group['assessment__subject_id'],
+                    assessment_id=group['assessment_id'],
+                    assessment_type=group['assessment__assessment_type'],
+                    count=group['count'],
+                    score_sum=group['score_sum'],
+                    score_sq_sum=group['score_sq_sum'],
+                    score_min=group['score_min'],
+                    score_max=group['score_max'],
+                    pass_count=group['pass_count']
+                )
+                for group in groups
+            ]
+
+            keys = {(row.section_id, row.assessment_id) for row in rows}
+            stale = [
+                pk for pk, section_id, assessment_id in existing.values_list('pk', 'section_id', 'assessment_id')
+                if (section_id, assessment_id) not in keys
+            ]
+            if stale:
+                self.filter(pk__in=stale).delete()
+            self.bulk_create(
+                rows,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['section', 'assessment'],
+                update_fields=GradeAggregate.MEASURE_FIELDS + ['year_level', 'subject', 'assessment_type', 'updated_at']
+            )
+            return rows
+
+class GradeAggregate(models.Model):
+    """
+    Grade statistics per section and assessment, on the percentage scale,
+    with year level, subject and assessment type copied in so that any
+    coarser level is a roll-up of these rows.
+    """
+    MEASURE_FIELDS = ['count', 'score_sum', 'score_sq_sum', 'score_min', 'score_max', 'pass_count']
+
+    year_level = models.IntegerField()
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='grade_aggregates')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='grade_aggregates')
+    assessment_type = models.CharField(max_length=10, choices=Assessment.TYPES)
+    assessment = models.ForeignKey(Assessment, on_delete=models.CASCADE, related_name='grade_aggregates')
+    count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    score_sq_sum = models.FloatField(default=0)
+    score_min = models.FloatField(null=True, blank=True)
+    score_max = models.FloatField(null=True, blank=True)
+    pass_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = GradeAggregateManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['section', 'assessment'], name='unique_grade_aggregate')
+        ]
+        indexes = [
+            models.Index(fields=['year_level', 'subject', 'assessment_type'], name='grade_agg_level_subject_idx'),
+            models.Index(fields=['subject', 'assessment_type'], name='grade_agg_subject_type_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.section_id} - {self.assessment_id}: {self.count} grades"
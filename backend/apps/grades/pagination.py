@@ -0,0 +1,140 @@
+# backend/apps/grades/pagination.py
+import base64
+import json
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Forward-only keyset (seek) pagination.
+    Rows are ordered by the given fields plus the primary key, and each page
+    starts strictly after the last row of the previous one, so the cost of a
+    page does not grow with its position. NULLs sort before every value.
+    Pagination is opt-in by default: without ?limit= or ?cursor= nothing is
+    paginated unless opt_in is False.
+    """
+    limit_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    default_limit = 50
+    max_limit = 500
+
+    def __init__(self, ordering, opt_in=True):
+        # ordering: list of field paths, each optionally prefixed with '-'
+        self.ordering = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.opt_in = opt_in
+
+    def order(self, queryset):
+        expressions = [
+            F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_first=True)
+            for name, descending in self.ordering
+        ]
+        return queryset.order_by(*expressions, 'pk')
+
+    def paginate_queryset(self, queryset, request):
+        params = request.query_params
+        if self.opt_in and self.limit_query_param not in params and self.cursor_query_param not in params:
+            return None
+
+        try:
+            self.limit = min(int(params.get(self.limit_query_param, self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ValidationError({self.limit_query_param: 'Must be an integer.'})
+        if self.limit < 1:
+            raise ValidationError({self.limit_query_param: 'Must be at least 1.'})
+
+        self.request = request
+        queryset = self.order(queryset)
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                queryset = queryset.filter(self._after(queryset.model, self._decode(cursor)))
+            except (DjangoValidationError, ValueError, TypeError):
+                # Well-formed cursor holding values the ordering fields reject.
+                raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+
+        rows = list(queryset[:self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        self.page = rows[:self.limit]
+        return self.page
+
+    def get_next_cursor(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        values = [self._value(last, name) for name, _ in self.ordering] + [last.pk]
+        payload = json.dumps(values, default=str, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    def get_next_link(self):
+        next_cursor = self.get_next_cursor()
+        if not next_cursor:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'next_cursor': self.get_next_cursor(),
+            'next': self.get_next_link()
+        })
+
+    @staticmethod
+    def _value(instance, path):
+        for part in path.split('__'):
+            instance = getattr(instance, part) if instance is not None else None
+        return instance
+
+    @staticmethod
+    def _field(model, path):
+        field = None
+        for part in path.split('__'):
+            field = model._meta.get_field(part)
+            model = field.related_model or model
+        return field
+
+    def _decode(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.ordering) + 1:
+                raise ValueError
+        except (ValueError, TypeError):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+        return values
+
+    def _after(self, model, values):
+        """Q matching rows that sort strictly after the cursor position."""
+        keys = [
+            (name, descending, self._field(model, name))
+            for name, descending in self.ordering
+        ] + [('pk', False, model._meta.pk)]
+
+        clauses = []
+        for index, (name, descending, field) in enumerate(keys):
+            value = values[index]
+            if value is not None:
+                value = field.to_python(value)
+
+            if value is None:
+                after = Q(pk__in=[]) if descending else Q(**{f'{name}__isnull': False})
+            elif descending:
+                after = Q(**{f'{name}__lt': value}) | Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__gt': value})
+
+            equal_before = [
+                Q(**{f'{prior}__isnull': True}) if values[i] is None
+                else Q(**{prior: prior_field.to_python(values[i])})
+                for i, (prior, _, prior_field) in enumerate(keys[:index])
+            ]
+            clauses.append(reduce(and_, equal_before, after))
+
+        return reduce(or_, clauses)
@@ -0,0 +1,89 @@
+# backend/apps/grades/rendering.py
+"""
+Report card renderers. They take plain dicts and return bytes, and import
+nothing from Django, so process pool workers can run them without setting
+up the project.
+"""
+import csv
+import io
+import re
+from html import escape
+
+REPORT_CARD_FORMATS = ('html', 'csv')
+
+REPORT_CARD_CSS = """
+body { font-family: Arial, sans-serif; margin: 2em; color: #222; }
+h1 { font-size: 1.4em; margin-bottom: 0; }
+.meta { color: #555; margin-top: .3em; }
+table { border-collapse: collapse; width: 100%; margin-top: 1.5em; }
+th, td { border: 1px solid #999; padding: .4em .6em; text-align: left; }
+td.num, th.num { text-align: right; }
+tfoot td { font-weight: bold; }
+@media print { body { margin: 0; } @page { margin: 1.5cm; } }
+"""
+
+
+def report_card_filename(card, extension):
+    """Archive path of a card: one folder per section, one file per student."""
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{card['student_number']}-{card['last_name']}_{card['first_name']}")
+    folder = re.sub(r'[^A-Za-z0-9_.-]+', '_', card['section']) or 'no-section'
+    return f"{folder}/{name}.{extension}"
+
+
+def _grade(value):
+    return '' if value is None else f'{value:.2f}'
+
+
+def render_html(card):
+    rows = ''.join(
+        '<tr><td>{code}</td><td>{name}</td><td class="num">{units}</td>'
+        '<td class="num">{grade}</td><td>{status}</td></tr>'.format(
+            code=escape(subject['subject_code']),
+            name=escape(subject['subject_name']),
+            units=subject['units'],
+            grade=_grade(subject['final_grade']),
+            status=escape(subject['status'])
+        )
+        for subject in card['subjects']
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Report card - {escape(card['student_name'])}</title>
+<style>{REPORT_CARD_CSS}</style>
+</head>
+<body>
+<h1>{escape(card['student_name'])}</h1>
+<p class="meta">Student ID {escape(card['student_number'])} &middot; {escape(card['section_label'])} &middot; Generated {escape(card['generated_at'])}</p>
+<table>
+<thead><tr><th>Code</th><th>Subject</th><th class="num">Units</th><th class="num">Final grade</th><th>Status</th></tr></thead>
+<tbody>{rows}</tbody>
+<tfoot><tr><td colspan="2">GPA ({card['graded_units']} graded units, {card['earned_units']} of {card['total_units']} earned)</td>
+<td></td><td class="num">{_grade(card['gpa'])}</td><td></td></tr></tfoot>
+</table>
+</body>
+</html>
+""".encode('utf-8')
+
+
+def render_csv(card):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['Student ID', 'Student', 'Section', 'Subject Code', 'Subject', 'Units', 'Final Grade', 'Status'])
+    for subject in card['subjects']:
+        writer.writerow([
+            card['student_number'], card['student_name'], card['section_label'],
+            subject['subject_code'], subject['subject_name'], subject['units'],
+            _grade(subject['final_grade']), subject['status']
+        ])
+    writer.writerow([card['student_number'], card['student_name'], card['section_label'], '', 'GPA', card['graded_units'], _grade(card['gpa']), ''])
+    return buffer.getvalue().encode('utf-8-sig')
+
+
+RENDERERS = {'html': render_html, 'csv': render_csv}
+
+
+def render_report_card(card, formats):
+    """[(archive path, bytes)] of one student's report card in each format."""
+    return [(report_card_filename(card, extension), RENDERERS[extension](card)) for extension in formats]
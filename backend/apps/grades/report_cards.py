@@ -0,0 +1,123 @@
+# backend/apps/grades/report_cards.py
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.students.models import Student
+from .models import Job
+from .rendering import render_report_card
+from .transcripts import compute_transcripts
+
+REPORT_CARD_DIR = 'report_cards'
+
+# Students fetched per query batch, and cards handed to a worker at a time.
+FETCH_CHUNK_SIZE = 500
+RENDER_CHUNK_SIZE = 25
+
+
+def report_card_students(section=None, year_level=None):
+    """Students whose report cards are generated: a section, a year level or everyone."""
+    students = Student.objects.select_related('section')
+    if section:
+        students = students.filter(section_id=section)
+    if year_level:
+        students = students.filter(section__year_level=year_level)
+    return students.order_by('section__year_level', 'section__name', 'last_name', 'first_name', 'id')
+
+
+def section_label(section):
+    """Printed section name; Section.__str__ only handles numeric names."""
+    if section is None:
+        return 'No section'
+    return f'Year {section.year_level} - Section {section.name}'
+
+
+def report_card_data(students):
+    """
+    Plain, picklable report card dicts for a chunk of students; the
+    transcripts of the whole chunk take two queries.
+    """
+    transcripts = compute_transcripts([student.id for student in students])
+    generated_at = timezone.localtime().strftime('%Y-%m-%d %H:%M')
+    return [
+        {
+            'student_number': student.student_id,
+            'first_name': student.first_name,
+            'last_name': student.last_name,
+            'student_name': student.full_name,
+            'section': f'{student.section.year_level}-{student.section.name}' if student.section else '',
+            'section_label': section_label(student.section),
+            'generated_at': generated_at,
+            **transcripts[student.id]
+        }
+        for student in students
+    ]
+
+
+def _chunks(queryset, size):
+    """Yield the queryset's rows in order, in lists of at most `size`."""
+    ids = list(queryset.values_list('id', flat=True))
+    for start in range(0, len(ids), size):
+        chunk_ids = ids[start:start + size]
+        by_id = queryset.in_bulk(chunk_ids)
+        yield [by_id[pk] for pk in chunk_ids if pk in by_id]
+
+
+def generate_report_cards(students, formats, filename, workers=None, progress=None):
+    """
+    Render report cards of a student queryset into MEDIA_ROOT/report_cards/
+    filename. Data is fetched in chunks in this process and rendered in a
+    pool of worker processes. Returns the archive's storage name and
+    throughput figures.
+    """
+    name = f'{REPORT_CARD_DIR}/{filename}'
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    total = students.count()
+    if progress:
+        progress(0, total)
+
+    started = time.perf_counter()
+    processed = 0
+    # spawn rather than fork: this may run on a thread of a web process.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor, \
+            zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for chunk in _chunks(students, FETCH_CHUNK_SIZE):
+            cards = report_card_data(chunk)
+            rendered = executor.map(render_report_card, cards, [formats] * len(cards), chunksize=RENDER_CHUNK_SIZE)
+            for files in rendered:
+                for archive_name, content in files:
+                    archive.writestr(archive_name, content)
+            processed += len(cards)
+            if progress:
+                progress(processed, total)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'file': name,
+        'students': processed,
+        'formats': list(formats),
+        'seconds': round(elapsed, 2),
+        'students_per_second': round(processed / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def run_report_cards(job, report_progress):
+    """Background task of a report card job; the archive becomes job.file."""
+    params = job.params
+    result = generate_report_cards(
+        report_card_students(params.get('section'), params.get('year_level')),
+        params['formats'],
+        f'report-cards-{job.pk}.zip',
+        workers=getattr(settings, 'REPORT_CARD_WORKERS', None),
+        progress=report_progress
+    )
+    Job.objects.filter(pk=job.pk).update(file=result['file'])
+    return result
@@ -1,6 +1,14 @@
 # backend/apps/grades/serializers.py
+import math
+
 from rest_framework import serializers
-from .models import Assessment, Grade
+from apps.students.models import Student
+from apps.subjects.models import Subject
+from apps.subjects.serializers import GradeWeightSerializer
+from .models import Assessment, Grade, GradeChange, Job
+from .writes import upsert_grades
+from .curves import CURVE_METHODS
+from .rendering import REPORT_CARD_FORMATS
 
 class AssessmentSerializer(serializers.ModelSerializer):
     subject_name = serializers.CharField(source='subject.name', read_only=True)
@@ -22,14 +30,182 @@ class AssessmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Max score must be greater than 0")
         return value
 
+class BulkAssessmentRowSerializer(serializers.Serializer):
+    """One assessment of a bulk create; subject is checked by the parent."""
+    name = serializers.CharField(max_length=100)
+    subject = serializers.IntegerField()
+    assessment_type = serializers.ChoiceField(choices=Assessment.TYPES)
+    max_score = serializers.DecimalField(max_digits=5, decimal_places=2)
+    date = serializers.DateField(required=False, allow_null=True)
+
+    def validate_max_score(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Max score must be greater than 0")
+        return value
+
+class BulkAssessmentCreateSerializer(serializers.Serializer):
+    assessments = BulkAssessmentRowSerializer(many=True, allow_empty=False)
+
+    def validate(self, data):
+        """Resolve every referenced subject with a single query."""
+        subject_ids = {row['subject'] for row in data['assessments']}
+        self.subjects = Subject.objects.in_bulk(subject_ids)
+
+        missing = subject_ids - set(self.subjects)
+        if missing:
+            raise serializers.ValidationError(
+                f"Subjects not found: {', '.join(str(pk) for pk in sorted(missing))}"
+            )
+        return data
+
+    def create(self, validated_data):
+        assessments = [
+            Assessment(
+                name=row['name'],
+                subject=self.subjects[row['subject']],
+                assessment_type=row['assessment_type'],
+                max_score=row['max_score'],
+                date=row.get('date')
+            )
+            for row in validated_data['assessments']
+        ]
+        return Assessment.objects.bulk_create(assessments)
+
+class CloneAssessmentsSerializer(serializers.Serializer):
+    source_subject = serializers.IntegerField()
+    target_subjects = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    assessment_types = serializers.ListField(
+        child=serializers.ChoiceField(choices=Assessment.TYPES),
+        required=False
+    )
+    skip_existing = serializers.BooleanField(
+        default=True,
+        help_text="Skip templates whose name and type already exist in a target subject"
+    )
+
+    def validate(self, data):
+        subject_ids = {data['source_subject'], *data['target_subjects']}
+        self.subjects = Subject.objects.in_bulk(subject_ids)
+
+        missing = subject_ids - set(self.subjects)
+        if missing:
+            raise serializers.ValidationError(
+                f"Subjects not found: {', '.join(str(pk) for pk in sorted(missing))}"
+            )
+        if data['source_subject'] in data['target_subjects']:
+            raise serializers.ValidationError("The source subject cannot also be a target")
+        return data
+
+    def create(self, validated_data):
+        templates = Assessment.objects.filter(subject_id=validated_data['source_subject'])
+        if validated_data.get('assessment_types'):
+            templates = templates.filter(assessment_type__in=validated_data['assessment_types'])
+        templates = list(templates)
+
+        existing = set()
+        if validated_data['skip_existing']:
+            existing = set(Assessment.objects.filter(
+                subject_id__in=validated_data['target_subjects']
+            ).values_list('subject_id', 'name', 'assessment_type'))
+
+        clones = [
+            Assessment(
+                name=template.name,
+                subject=self.subjects[target_id],
+                assessment_type=template.assessment_type,
+                max_score=template.max_score,
+                date=template.date
+            )
+            for target_id in dict.fromkeys(validated_data['target_subjects'])
+            for template in templates
+            if (target_id, template.name, template.assessment_type) not in existing
+        ]
+        return Assessment.objects.bulk_create(clones)
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field that looks instances up in the maps prefetched by a
+    parent GradeListSerializer, and queries one by one otherwise.
+    """
+    def to_internal_value(self, data):
+        prefetched = getattr(self.root, 'prefetched', None)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return prefetched[self.queryset.model][int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+class GradeListSerializer(serializers.ListSerializer):
+    """
+    Validates many grades against students and assessments fetched in one
+    query each, checks uniqueness for the whole batch at once and creates
+    them with a single bulk insert.
+    """
+    @staticmethod
+    def _ids(data, field):
+        ids = set()
+        for row in data:
+            try:
+                ids.add(int(row.get(field)))
+            except (AttributeError, TypeError, ValueError):
+                pass
+        return ids
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.prefetched = {
+                Student: Student.objects.in_bulk(self._ids(data, 'student')),
+                Assessment: Assessment.objects.in_bulk(self._ids(data, 'assessment')),
+            }
+        rows = super().to_internal_value(data)
+
+        pairs = [(row['student'].pk, row['assessment'].pk) for row in rows]
+        existing = set(Grade.objects.filter(
+            student_id__in={student_id for student_id, _ in pairs},
+            assessment_id__in={assessment_id for _, assessment_id in pairs}
+        ).values_list('student_id', 'assessment_id'))
+
+        seen, errors = set(), []
+        for pair in pairs:
+            if pair in existing or pair in seen:
+                errors.append({'non_field_errors': ['The fields student, assessment must make a unique set.']})
+            else:
+                errors.append({})
+            seen.add(pair)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return rows
+
+    def create(self, validated_data):
+        return upsert_grades(
+            [Grade(**attrs) for attrs in validated_data],
+            {assessment.pk: assessment.subject_id for assessment in self.prefetched[Assessment].values()},
+            GradeChange.BULK
+        )
+
 class GradeSerializer(serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.full_name', read_only=True)
     assessment_name = serializers.CharField(source='assessment.name', read_only=True)
     percentage = serializers.ReadOnlyField()
+    student = PrefetchedPrimaryKeyRelatedField(queryset=Student.objects.all())
+    assessment = PrefetchedPrimaryKeyRelatedField(queryset=Assessment.objects.all())
     
     class Meta:
         model = Grade
         fields = '__all__'
+        list_serializer_class = GradeListSerializer
+        extra_kwargs = {'score': {'min_value': 0}}
+
+    def get_validators(self):
+        # Within a list, uniqueness is checked for every row at once.
+        if isinstance(self.parent, serializers.ListSerializer):
+            return []
+        return super().get_validators()
     
     def validate(self, data):
         """
@@ -58,11 +234,72 @@ class GradeBookSerializer(serializers.Serializer):
 
 class BulkGradeUpdateSerializer(serializers.Serializer):
     grades = serializers.ListField(
-        child=serializers.DictField(
-            child=serializers.DecimalField(max_digits=5, decimal_places=2)
-        )
+        child=serializers.DictField()
     )
 
+class BulkGradeRowSerializer(serializers.Serializer):
+    """One row of a bulk grade update; validated in memory, without queries."""
+    student_id = serializers.IntegerField()
+    assessment_id = serializers.IntegerField()
+    score = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0)
+
+class WeightSimulationSerializer(serializers.Serializer):
+    MAX_OPTIONS = 50
+
+    weights = GradeWeightSerializer(many=True, allow_empty=False, max_length=MAX_OPTIONS)
+    section = serializers.IntegerField(required=False)
+    include_students = serializers.BooleanField(default=False)
+
+    def validate_weights(self, value):
+        # Each option must carry all three weights (and sum to 100).
+        for option in value:
+            missing = [f for f in ('activity_weight', 'quiz_weight', 'exam_weight') if f not in option]
+            if missing:
+                raise serializers.ValidationError(f"Missing weights: {', '.join(missing)}")
+        return [
+            {
+                'activity': option['activity_weight'],
+                'quiz': option['quiz_weight'],
+                'exam': option['exam_weight']
+            }
+            for option in value
+        ]
+
+class CurveSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=CURVE_METHODS)
+    points = serializers.FloatField(required=False, default=0)
+    target_mean = serializers.FloatField(required=False, min_value=0)
+    target_std = serializers.FloatField(required=False, min_value=0)
+    cap = serializers.BooleanField(default=True, help_text="Clamp scores to the assessment's max_score instead of rejecting the curve")
+    section = serializers.IntegerField(required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        # Bounds come from the curved assessment, passed in the context.
+        max_score = float(self.context['assessment'].max_score)
+        for field in ('points', 'target_mean', 'target_std'):
+            value = data.get(field)
+            if value is None:
+                continue
+            if not math.isfinite(value):
+                raise serializers.ValidationError({field: "Must be a finite number"})
+            if abs(value) > max_score:
+                raise serializers.ValidationError({field: f"Must be within the assessment's maximum score ({max_score:g})"})
+
+        if data['method'] in ('scale', 'zscore') and data.get('target_mean') is None:
+            raise serializers.ValidationError({'target_mean': f"Required for the {data['method']} method"})
+        return data
+
+class ReportCardRequestSerializer(serializers.Serializer):
+    section = serializers.IntegerField(required=False)
+    year_level = serializers.IntegerField(required=False)
+    formats = serializers.MultipleChoiceField(choices=REPORT_CARD_FORMATS, default=['html'])
+
+    def validate_formats(self, value):
+        if not value:
+            raise serializers.ValidationError("Choose at least one format")
+        return sorted(value)
+
 class StudentGradeSerializer(serializers.ModelSerializer):
     subject = serializers.CharField(source='assessment.subject.name')
     assessment = serializers.CharField(source='assessment.name')
@@ -76,3 +313,13 @@ class StudentGradeSerializer(serializers.ModelSerializer):
             'id', 'subject', 'assessment', 'score',
             'max_score', 'percentage', 'assessment_type', 'date'
         ]
+
+class JobSerializer(serializers.ModelSerializer):
+    progress = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'params', 'total', 'processed', 'progress',
+            'result', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
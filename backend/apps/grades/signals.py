@@ -0,0 +1,156 @@
+# backend/apps/grades/signals.py
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from apps.students.models import Section, Student
+from apps.subjects.models import Enrollment, GradeWeight, Subject
+from .caching import invalidate_dashboard_stats, invalidate_transcripts
+from .events import publish_grade_changes
+from .models import Assessment, FinalGrade, Grade, GradeAggregate, GradeChange
+
+
+def _origin_model(origin):
+    """Model whose deletion started a cascade (origin is an instance or a queryset)."""
+    if origin is None:
+        return None
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _refresh_aggregate_cell(grade):
+    """Refresh the one (section, assessment) aggregate a grade belongs to."""
+    section_id = Student.objects.filter(pk=grade.student_id).values_list('section_id', flat=True).first()
+    if section_id is not None:
+        GradeAggregate.objects.refresh([grade.assessment_id], [section_id])
+
+
+@receiver(post_save, sender=Grade)
+def grade_saved(sender, instance, **kwargs):
+    GradeChange.objects.record(
+        [(instance.student_id, instance.assessment_id, instance.score)],
+        GradeChange.SINGLE,
+        changed_at=instance.updated_at
+    )
+    subject_id = instance.assessment.subject_id
+    FinalGrade.objects.refresh(subject_id, [instance.student_id])
+    _refresh_aggregate_cell(instance)
+    publish_grade_changes(subject_id, [(instance.student_id, instance.assessment_id, instance.score)])
+
+
+@receiver(post_delete, sender=Grade)
+def grade_deleted(sender, instance, origin=None, **kwargs):
+    # Grades removed by cascade from an assessment are refreshed once by
+    # assessment_deleted; cascades from students and subjects take the
+    # final grade rows with them.
+    if _origin_model(origin) not in (None, Grade):
+        return
+    GradeChange.objects.record([(instance.student_id, instance.assessment_id, None)], GradeChange.SINGLE)
+    subject_id = Assessment.objects.filter(pk=instance.assessment_id).values_list('subject_id', flat=True).first()
+    if subject_id is not None:
+        FinalGrade.objects.refresh(subject_id, [instance.student_id])
+        _refresh_aggregate_cell(instance)
+        publish_grade_changes(subject_id, [(instance.student_id, instance.assessment_id, None)])
+
+
+@receiver(post_save, sender=Assessment)
+def assessment_saved(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None)
+    if created or loaded is None:
+        return
+
+    old_subject_id = loaded.get('subject_id')
+    changed = (
+        loaded.get('max_score') != instance.max_score
+        or loaded.get('assessment_type') != instance.assessment_type
+        or old_subject_id != instance.subject_id
+    )
+    if not changed:
+        return
+
+    student_ids = list(Grade.objects.filter(assessment=instance).values_list('student_id', flat=True))
+    FinalGrade.objects.refresh(instance.subject_id, student_ids)
+    if old_subject_id is not None and old_subject_id != instance.subject_id:
+        FinalGrade.objects.refresh(old_subject_id, student_ids)
+    GradeAggregate.objects.refresh([instance.id])
+
+    instance._loaded_values.update(
+        subject_id=instance.subject_id,
+        max_score=instance.max_score,
+        assessment_type=instance.assessment_type
+    )
+
+
+@receiver(post_delete, sender=Assessment)
+def assessment_deleted(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) is Assessment:
+        FinalGrade.objects.refresh(instance.subject_id)
+
+
+@receiver(post_save, sender=GradeWeight)
+def grade_weight_saved(sender, instance, **kwargs):
+    FinalGrade.objects.reweight(instance.subject_id)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def dashboard_data_changed(sender, **kwargs):
+    invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def enrollment_changed(sender, instance, **kwargs):
+    invalidate_transcripts([instance.student_id])
+
+
+@receiver(post_save, sender=Subject)
+def subject_saved(sender, instance, created, **kwargs):
+    # Units, code or name may have changed on every enrolled transcript.
+    if not created:
+        invalidate_transcripts(
+            Enrollment.objects.filter(subject=instance).values_list('student_id', flat=True)
+        )
+
+
+@receiver(pre_save, sender=Student)
+def student_saving(sender, instance, **kwargs):
+    # Remember the stored section so student_saved can tell a move apart.
+    instance._stored_section_id = (
+        Student.objects.filter(pk=instance.pk).values_list('section_id', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created, **kwargs):
+    # A student who moved section takes their grades to the new section's
+    # groups; only the old and new sections' cells are regrouped.
+    old_section_id = getattr(instance, '_stored_section_id', None)
+    if created or old_section_id == instance.section_id:
+        return
+    assessment_ids = list(Grade.objects.filter(student=instance).values_list('assessment_id', flat=True))
+    if assessment_ids:
+        GradeAggregate.objects.refresh(
+            assessment_ids,
+            [section_id for section_id in (old_section_id, instance.section_id) if section_id is not None]
+        )
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    # The student's grades went with them; their section's groups shrink.
+    if instance.section_id is not None:
+        GradeAggregate.objects.refresh(section_ids=[instance.section_id])
+
+
+@receiver(post_save, sender=Section)
+def section_saved(sender, instance, created, **kwargs):
+    if not created:
+        GradeAggregate.objects.filter(section=instance).exclude(
+            year_level=instance.year_level
+        ).update(year_level=instance.year_level)
@@ -0,0 +1,112 @@
+# backend/apps/grades/simulations.py
+import numpy as np
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from .calculations import ASSESSMENT_TYPES, PASSING_GRADE
+
+
+def load_category_totals(final_grades):
+    """
+    Read the stored per-category totals of a FinalGrade queryset into NumPy
+    arrays with one query.
+    Returns (student_ids, scores, maxima, current) where scores and maxima
+    have one column per assessment_type and current holds the stored final
+    grades (NaN when ungraded).
+    """
+    columns = [
+        Cast(f'{assessment_type}_{part}', FloatField())
+        for part in ('score', 'max')
+        for assessment_type in ASSESSMENT_TYPES
+    ]
+    rows = list(final_grades.values_list('student_id', Cast('final_grade', FloatField()), *columns))
+    width = len(ASSESSMENT_TYPES)
+    if not rows:
+        empty = np.empty((0, width), dtype=np.float64)
+        return np.empty(0, dtype=np.int64), empty, empty, np.empty(0, dtype=np.float64)
+
+    data = np.array(rows, dtype=np.float64)
+    return (
+        data[:, 0].astype(np.int64),
+        data[:, 2:2 + width],
+        data[:, 2 + width:],
+        data[:, 1]
+    )
+
+
+def simulate_final_grades(scores, maxima, weights):
+    """
+    Final grades of every student under every weight vector in one pass.
+    weights is a (scenarios, assessment_types) array. Mirrors
+    weighted_final_grade: categories without graded work are left out and
+    the remaining weights rescaled. Returns a (students, scenarios) array,
+    NaN where nothing can be graded.
+    """
+    graded = maxima > 0
+    percentages = np.divide(scores * 100, maxima, out=np.zeros_like(scores), where=graded)
+    weighted_sum = percentages @ weights.T
+    weight_sum = graded.astype(np.float64) @ weights.T
+    final_grades = np.divide(
+        weighted_sum, weight_sum,
+        out=np.full(weighted_sum.shape, np.nan), where=weight_sum > 0
+    )
+    return np.round(final_grades, 2)
+
+
+def grade_outcomes(final_grades, passing=PASSING_GRADE):
+    """Pass/fail counts and summary of one column of simulated final grades."""
+    graded = final_grades[~np.isnan(final_grades)]
+    if not graded.size:
+        return {'graded': 0, 'passed': 0, 'failed': 0, 'mean': None, 'median': None, 'min': None, 'max': None}
+    passed = int(np.count_nonzero(graded >= passing))
+    return {
+        'graded': int(graded.size),
+        'passed': passed,
+        'failed': int(graded.size) - passed,
+        'mean': round(float(graded.mean()), 2),
+        'median': round(float(np.median(graded)), 2),
+        'min': round(float(graded.min()), 2),
+        'max': round(float(graded.max()), 2)
+    }
+
+
+def _nullable(values):
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def simulate_weights(final_grades, weight_options, include_students=False, passing=PASSING_GRADE):
+    """
+    Compare the current final grades of a FinalGrade queryset with the ones
+    each candidate weight option would give. weight_options is a list of
+    {assessment_type: weight}. Nothing is written to the database.
+    """
+    student_ids, scores, maxima, current = load_category_totals(final_grades)
+    weights = np.array(
+        [[float(option[assessment_type]) for assessment_type in ASSESSMENT_TYPES] for option in weight_options],
+        dtype=np.float64
+    ).reshape(len(weight_options), len(ASSESSMENT_TYPES))
+    simulated = simulate_final_grades(scores, maxima, weights)
+
+    currently_passing = current >= passing
+    scenarios = []
+    for index, option in enumerate(weight_options):
+        column = simulated[:, index]
+        passing_now = column >= passing
+        both_graded = ~np.isnan(column) & ~np.isnan(current)
+        scenario = {
+            'weights': {assessment_type: float(option[assessment_type]) for assessment_type in ASSESSMENT_TYPES},
+            **grade_outcomes(column, passing),
+            'newly_passing': int(np.count_nonzero(both_graded & passing_now & ~currently_passing)),
+            'newly_failing': int(np.count_nonzero(both_graded & ~passing_now & currently_passing)),
+            'mean_change': round(float(np.mean(column[both_graded] - current[both_graded])), 2)
+            if both_graded.any() else None
+        }
+        if include_students:
+            scenario['final_grades'] = _nullable(column)
+        scenarios.append(scenario)
+
+    result = {'current': grade_outcomes(current, passing), 'scenarios': scenarios}
+    if include_students:
+        result['student_ids'] = student_ids.tolist()
+        result['current']['final_grades'] = _nullable(current)
+    return result
@@ -1,3 +1,1156 @@
-from django.test import TestCase
-
-# Create your tests here.
+import csv
+import io
+import tempfile
+import time
+import zipfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.students.models import Section, Student
+from apps.subjects.models import Enrollment, GradeWeight, Subject
+from .caching import DASHBOARD_STATS_KEY
+from .curves import MAX_STORED_SCORE, curve_scores
+from .events import (
+    STREAM_TOKEN_MAX_AGE, get_broker, gradebook_channel, publish_grade_changes, stream_token_user_id
+)
+from .imports import plan_import, preview_import, run_import
+from .models import Assessment, FinalGrade, Grade, GradeAggregate, GradeChange, Job
+from .rendering import render_report_card
+from .report_cards import report_card_data, report_card_students
+from .transcripts import get_transcripts
+from .views import authenticate_event_stream, gradebook_events
+
+
+class GradesTestCase(TestCase):
+    """A section with enrolled students and a subject with one assessment of each type."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='teacher', password='password')
+        cls.section = Section.objects.create(name='1', year_level=1)
+        cls.subject = Subject.objects.create(code='MATH1', name='Mathematics', units=3, year_level=1)
+        cls.activity = Assessment.objects.create(
+            name='Activity 1', subject=cls.subject, assessment_type='activity', max_score=Decimal('50')
+        )
+        cls.quiz = Assessment.objects.create(
+            name='Quiz 1', subject=cls.subject, assessment_type='quiz', max_score=Decimal('20')
+        )
+        cls.exam = Assessment.objects.create(
+            name='Exam 1', subject=cls.subject, assessment_type='exam', max_score=Decimal('100')
+        )
+        cls.students = cls.create_students(3)
+
+    @classmethod
+    def create_students(cls, count, section=None, start=0):
+        students = []
+        for number in range(start, start + count):
+            student = Student.objects.create(
+                student_id=f'S{number:05d}',
+                first_name='Student',
+                last_name=f'{number:05d}',
+                email=f's{number}@example.com',
+                date_of_birth=date(2005, 1, 1),
+                section=section or cls.section
+            )
+            Enrollment.objects.create(student=student, subject=cls.subject)
+            students.append(student)
+        return students
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def grade(self, student, assessment, score):
+        return Grade.objects.create(student=student, assessment=assessment, score=Decimal(score))
+
+
+class GradebookTests(GradesTestCase):
+    def gradebook_queries(self, students):
+        for student in students:
+            for assessment, score in ((self.activity, '40'), (self.quiz, '15'), (self.exam, '90')):
+                self.grade(student, assessment, score)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('gradebook', args=[self.section.id]), {'subject': self.subject.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), Student.objects.filter(section=self.section).count())
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_section_size(self):
+        small = self.gradebook_queries(self.students)
+        large = self.gradebook_queries(self.create_students(len(self.students), start=len(self.students)))
+        self.assertEqual(small, large)
+
+        with self.assertNumQueries(small):
+            self.client.get(reverse('gradebook', args=[self.section.id]), {'subject': self.subject.id})
+
+    def test_rows_hold_scores_totals_and_averages(self):
+        student = self.students[0]
+        self.grade(student, self.activity, '40')
+        self.grade(student, self.exam, '90')
+
+        response = self.client.get(reverse('gradebook', args=[self.section.id]), {'subject': self.subject.id})
+
+        row = next(row for row in response.json() if row['student_id'] == student.id)
+        self.assertEqual(row['grades'], {'Activity 1': 40, 'Quiz 1': 0, 'Exam 1': 90})
+        self.assertEqual(Decimal(row['total_score']), Decimal('130'))
+        self.assertEqual(row['average'], round(130 / 170 * 100, 2))
+
+    def test_columnar_layout(self):
+        student = self.students[0]
+        self.grade(student, self.activity, '40')
+        self.grade(student, self.exam, '90')
+
+        response = self.client.get(
+            reverse('gradebook', args=[self.section.id]), {'subject': self.subject.id, 'layout': 'columnar'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        columns = [assessment['id'] for assessment in data['assessments']]
+        self.assertCountEqual(columns, [self.activity.id, self.quiz.id, self.exam.id])
+        self.assertEqual([row['id'] for row in data['students']], [student.id for student in self.students])
+
+        scores = dict(zip(columns, data['scores'][0]))
+        self.assertEqual(scores, {self.activity.id: 40.0, self.quiz.id: None, self.exam.id: 90.0})
+        self.assertEqual(data['scores'][1], [None, None, None])
+        self.assertEqual(data['total_score'], [130.0, 0.0, 0.0])
+        self.assertEqual(data['average'][0], round(130 / 170 * 100, 2))
+
+    def test_unknown_layout_is_rejected(self):
+        response = self.client.get(
+            reverse('gradebook', args=[self.section.id]), {'subject': self.subject.id, 'layout': 'pivot'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class WindowedGradebookTests(GradesTestCase):
+    def setUp(self):
+        super().setUp()
+        for student in self.students:
+            self.grade(student, self.activity, '40')
+            self.grade(student, self.quiz, '15')
+
+    def gradebook(self, **params):
+        response = self.client.get(
+            reverse('gradebook', args=[self.section.id]), {'subject': self.subject.id, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_students_by_name(self):
+        first = self.gradebook(limit=2)
+        second = self.gradebook(limit=2, cursor=first['next_cursor'])
+
+        self.assertEqual(
+            [row['student_id'] for row in first['results'] + second['results']],
+            [student.id for student in self.students]
+        )
+        self.assertIsNone(second['next_cursor'])
+
+    def test_columnar_pages_keep_the_header(self):
+        page = self.gradebook(limit=2, layout='columnar')
+
+        self.assertEqual(len(page['assessments']), 3)
+        self.assertEqual([row['id'] for row in page['students']], [student.id for student in self.students[:2]])
+        self.assertEqual(len(page['scores']), 2)
+        self.assertIsNotNone(page['next_cursor'])
+
+    def test_assessment_window_keeps_full_totals(self):
+        rows = self.gradebook(type='quiz')
+
+        self.assertEqual(rows[0]['grades'], {'Quiz 1': 15})
+        self.assertEqual(Decimal(str(rows[0]['total_score'])), Decimal('55'))
+        self.assertEqual(rows[0]['average'], round(55 / 170 * 100, 2))
+
+    def test_window_and_page_together(self):
+        page = self.gradebook(type='activity', limit=1, layout='columnar')
+
+        self.assertEqual([assessment['id'] for assessment in page['assessments']], [self.activity.id])
+        self.assertEqual(page['scores'], [[40.0]])
+        self.assertEqual(page['total_score'], [55.0])
+
+
+class GradeListTests(GradesTestCase):
+    def test_create_many_then_page_through_them(self):
+        payload = [
+            {'student': student.id, 'assessment': assessment.id, 'score': 5}
+            for student in self.students
+            for assessment in (self.activity, self.quiz)
+        ]
+        response = self.client.post(reverse('grade-list-create'), payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Grade.objects.count(), 6)
+
+        # Paginated without asking: the default page size applies.
+        page = self.client.get(reverse('grade-list-create'), {'ordering': 'student'}).json()
+        self.assertEqual(len(page['results']), 6)
+        self.assertIsNone(page['next_cursor'])
+
+        seen, params = [], {'ordering': 'student', 'limit': 4}
+        while True:
+            page = self.client.get(reverse('grade-list-create'), params).json()
+            seen += [row['id'] for row in page['results']]
+            if not page['next_cursor']:
+                break
+            params['cursor'] = page['next_cursor']
+        self.assertEqual(sorted(seen), sorted(Grade.objects.values_list('id', flat=True)))
+
+        filtered = self.client.get(reverse('grade-list-create'), {'student': self.students[0].id, 'type': 'quiz'}).json()
+        self.assertEqual([row['assessment'] for row in filtered['results']], [self.quiz.id])
+
+    def test_batch_is_rejected_as_a_whole(self):
+        payload = [
+            {'student': self.students[0].id, 'assessment': self.quiz.id, 'score': 5},
+            {'student': self.students[1].id, 'assessment': self.quiz.id, 'score': 50},
+            {'student': self.students[0].id, 'assessment': self.quiz.id, 'score': 6},
+        ]
+        response = self.client.post(reverse('grade-list-create'), payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Grade.objects.exists())
+
+    def test_non_integer_ids_are_rejected(self):
+        requests = [
+            (reverse('grade-list-create'), 'student'),
+            (reverse('grade-list-create'), 'section'),
+            (reverse('grade-list-create'), 'assessment'),
+            (reverse('grade-history'), 'subject'),
+            (reverse('section-final-grades', args=[self.section.id]), 'subject'),
+            (reverse('export-grades', args=[self.section.id]), 'subject'),
+            (reverse('subject-statistics', args=[self.subject.id]), 'section'),
+            (reverse('subject-statistics', args=[self.subject.id]), 'bins'),
+            (reverse('at-risk-students'), 'year_level'),
+            (reverse('grade-analytics'), 'section'),
+            (reverse('class-rankings', args=[self.subject.id]), 'year_level'),
+        ]
+        for url, param in requests:
+            response = self.client.get(url, {param: 'abc'})
+            self.assertEqual(response.status_code, 400, (url, param))
+            self.assertIn(param, response.json())
+
+
+class UpdateGradeTests(GradesTestCase):
+    def update(self, **data):
+        return self.client.post(reverse('update-grade'), data, format='json')
+
+    def test_creates_then_updates_and_returns_the_row(self):
+        student = self.students[0]
+        self.assertEqual(self.update(student=student.id, assessment=self.quiz.id, score=10).status_code, 200)
+
+        response = self.update(student=student.id, assessment=self.quiz.id, score=15)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Grade.objects.get(student=student, assessment=self.quiz).score, Decimal('15'))
+        self.assertEqual(response.json()['gradebook_row']['grades']['Quiz 1'], 15)
+
+    def test_invalid_payloads_are_rejected(self):
+        student = self.students[0]
+        self.grade(student, self.quiz, '10')
+        for data in (
+            {'student': student.id, 'assessment': self.quiz.id, 'score': 21},
+            {'student': student.id, 'assessment': self.quiz.id, 'score': -1},
+            {'student': student.id, 'assessment': 9999, 'score': 5},
+            {'student': 'abc', 'assessment': self.quiz.id, 'score': 5},
+        ):
+            self.assertEqual(self.update(**data).status_code, 400, data)
+        self.assertEqual(Grade.objects.get(student=student, assessment=self.quiz).score, Decimal('10'))
+
+
+class FinalGradeTests(GradesTestCase):
+    def final_grade(self, student):
+        return FinalGrade.objects.get(student=student, subject=self.subject).final_grade
+
+    def test_grade_writes_keep_final_grade_current(self):
+        student = self.students[0]
+        self.grade(student, self.activity, '40')
+        quiz = self.grade(student, self.quiz, '15')
+        self.grade(student, self.exam, '90')
+        # 80% * 30 + 75% * 30 + 90% * 40
+        self.assertEqual(self.final_grade(student), Decimal('82.50'))
+
+        quiz.score = Decimal('20')
+        quiz.save()
+        self.assertEqual(self.final_grade(student), Decimal('90.00'))
+
+        quiz.delete()
+        # Only activity and exam remain: (80 * 30 + 90 * 40) / 70
+        self.assertEqual(self.final_grade(student), Decimal('85.71'))
+
+    def test_last_grade_deleted_removes_the_row(self):
+        grade = self.grade(self.students[0], self.activity, '40')
+        grade.delete()
+        self.assertFalse(FinalGrade.objects.filter(student=self.students[0]).exists())
+
+    def test_weight_and_max_score_changes_recompute(self):
+        student = self.students[0]
+        self.grade(student, self.activity, '40')
+        self.grade(student, self.quiz, '15')
+        self.grade(student, self.exam, '90')
+
+        GradeWeight.objects.create(
+            subject=self.subject, activity_weight=50, quiz_weight=25, exam_weight=25
+        )
+        self.assertEqual(self.final_grade(student), Decimal('81.25'))
+
+        exam = Assessment.objects.get(pk=self.exam.pk)
+        exam.max_score = Decimal('180')
+        exam.save()
+        # 80% * 50 + 75% * 25 + 50% * 25
+        self.assertEqual(self.final_grade(student), Decimal('71.25'))
+
+    def test_rebuild_command_repairs_stale_rows(self):
+        student = self.students[0]
+        self.grade(student, self.activity, '40')
+        FinalGrade.objects.filter(student=student).update(final_grade=Decimal('1'))
+
+        output = io.StringIO()
+        call_command('rebuild_final_grades', '--verify', stdout=output)
+        self.assertIn('out of date', output.getvalue())
+
+        call_command('rebuild_final_grades', stdout=io.StringIO())
+        self.assertEqual(self.final_grade(student), Decimal('80.00'))
+
+
+class SectionFinalGradesTests(GradesTestCase):
+    def test_every_enrollment_in_a_constant_number_of_queries(self):
+        other = Subject.objects.create(code='SCI1', name='Science', units=3, year_level=1)
+        Enrollment.objects.create(student=self.students[0], subject=other)
+        self.grade(self.students[0], self.activity, '40')
+        self.grade(self.students[0], self.exam, '90')
+        self.grade(self.students[1], self.quiz, '10')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('section-final-grades', args=[self.section.id]))
+        rows = {(row['student_id'], row['subject_code']): row for row in response.json()}
+
+        self.assertEqual(len(rows), 4)
+        # (80 * 30 + 90 * 40) / 70, missing categories left out
+        self.assertEqual(float(rows[(self.students[0].id, 'MATH1')]['final_grade']), 85.71)
+        self.assertEqual(float(rows[(self.students[1].id, 'MATH1')]['final_grade']), 50.0)
+        self.assertEqual(rows[(self.students[2].id, 'MATH1')]['status'], 'No grades yet')
+        self.assertEqual(rows[(self.students[0].id, 'SCI1')]['status'], 'No grades yet')
+
+        self.create_students(3, start=10)
+        with self.assertNumQueries(len(queries)):
+            self.client.get(reverse('section-final-grades', args=[self.section.id]))
+
+    def test_subject_filter(self):
+        other = Subject.objects.create(code='SCI1', name='Science', units=3, year_level=1)
+        Enrollment.objects.create(student=self.students[0], subject=other)
+        response = self.client.get(reverse('section-final-grades', args=[self.section.id]), {'subject': other.id})
+        self.assertEqual([row['subject_code'] for row in response.json()], ['SCI1'])
+
+
+class ExportTests(GradesTestCase):
+    def export(self, **params):
+        response = self.client.get(reverse('export-grades', args=[self.section.id]), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_export_streams_one_row_per_grade(self):
+        self.grade(self.students[0], self.activity, '40')
+        self.grade(self.students[1], self.exam, '90')
+
+        response, content = self.export()
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('grades-year1-section1.csv', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(rows[0][:3], ['Section', 'Student ID', 'Last Name'])
+        self.assertEqual(
+            [(row[1], row[5], row[9], row[10]) for row in rows[1:]],
+            [('S00000', 'Activity 1', '40.00', '80.00'), ('S00001', 'Exam 1', '90.00', '90.00')]
+        )
+
+    def test_xlsx_export_is_a_readable_workbook(self):
+        self.grade(self.students[0], self.activity, '40')
+
+        response, content = self.export(file_format='xlsx')
+
+        with zipfile.ZipFile(io.BytesIO(content)) as package:
+            self.assertIsNone(package.testzip())
+            sheet = package.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('<t>S00000</t>', sheet)
+        self.assertIn('<row r="2">', sheet)
+        self.assertNotIn('<row r="3">', sheet)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse('export-grades', args=[self.section.id]), {'file_format': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkUpdateTests(GradesTestCase):
+    def test_each_row_reports_its_outcome(self):
+        first, second, _ = self.students
+        self.grade(first, self.quiz, '5')
+        rows = [
+            {'student_id': first.id, 'assessment_id': self.quiz.id, 'score': '10'},
+            {'student_id': second.id, 'assessment_id': self.quiz.id, 'score': '25'},
+            {'student_id': second.id, 'assessment_id': 9999, 'score': '5'},
+            {'student_id': 9999, 'assessment_id': self.quiz.id, 'score': '5'},
+            {'student_id': second.id, 'assessment_id': self.quiz.id, 'score': '-1'},
+            {'student_id': first.id, 'assessment_id': self.quiz.id, 'score': '12'},
+            {'student_id': second.id, 'assessment_id': self.exam.id, 'score': '70'},
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(reverse('bulk-update-grades'), {'grades': rows}, format='json')
+        data = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((data['updated'], data['failed']), (2, 4))
+        self.assertEqual([result['success'] for result in data['results']], [True, False, False, False, False, True, True])
+        self.assertEqual(data['results'][0]['superseded_by'], 5)
+        self.assertIn('maximum score', data['results'][1]['errors'][0])
+        self.assertEqual(data['results'][2]['errors'], ['Assessment 9999 not found'])
+        self.assertEqual(data['results'][3]['errors'], ['Student 9999 not found'])
+        self.assertIn('score', data['results'][4]['errors'])
+
+        self.assertEqual(Grade.objects.get(student=first, assessment=self.quiz).score, Decimal('12'))
+        self.assertEqual(Grade.objects.get(student=second, assessment=self.exam).score, Decimal('70'))
+        self.assertEqual(FinalGrade.objects.get(student=second, subject=self.subject).final_grade, Decimal('70.00'))
+
+        # Twice the rows, same number of queries.
+        more = [dict(row, score='1') for row in rows if row['student_id'] != 9999 and row['assessment_id'] != 9999] * 2
+        with self.assertNumQueries(len(queries)):
+            self.client.put(reverse('bulk-update-grades'), {'grades': rows + more}, format='json')
+
+    def test_malformed_body_is_rejected(self):
+        response = self.client.put(reverse('bulk-update-grades'), {'grades': 'nope'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class StatisticsTests(GradesTestCase):
+    def test_distribution_on_the_percentage_scale(self):
+        for student, score in zip(self.students, ('10', '40', '50')):
+            self.grade(student, self.activity, score)
+        self.grade(self.students[0], self.exam, '75')
+
+        response = self.client.get(reverse('subject-statistics', args=[self.subject.id]), {'bins': 5})
+        data = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['overall']['count'], 4)
+        activity = data['by_type']['activity']
+        self.assertEqual((activity['min'], activity['median'], activity['max']), (20, 80, 100))
+        self.assertEqual(activity['mean'], round((20 + 80 + 100) / 3, 2))
+        self.assertEqual(activity['pass_rate'], round(2 / 3 * 100, 2))
+        self.assertEqual(activity['histogram']['counts'], [0, 1, 0, 0, 2])
+        self.assertEqual(data['by_type']['quiz']['count'], 0)
+        self.assertIsNone(data['by_type']['quiz']['mean'])
+        self.assertEqual(
+            {row['name']: row['count'] for row in data['assessments']},
+            {'Activity 1': 3, 'Quiz 1': 0, 'Exam 1': 1}
+        )
+
+    def test_section_filter_and_bins_bounds(self):
+        other = Section.objects.create(name='2', year_level=1)
+        self.grade(self.create_students(1, section=other, start=10)[0], self.activity, '10')
+        self.grade(self.students[0], self.activity, '40')
+
+        response = self.client.get(reverse('subject-statistics', args=[self.subject.id]), {'section': other.id})
+        self.assertEqual(response.json()['overall']['count'], 1)
+        for bins in (0, 101):
+            response = self.client.get(reverse('subject-statistics', args=[self.subject.id]), {'bins': bins})
+            self.assertEqual(response.status_code, 400)
+
+
+class StudentGradesTests(GradesTestCase):
+    def test_weighted_grades_per_subject(self):
+        GradeWeight.objects.create(subject=self.subject, activity_weight=50, quiz_weight=0, exam_weight=50)
+        self.grade(self.students[0], self.activity, '40')
+        self.grade(self.students[0], self.quiz, '5')
+        self.grade(self.students[0], self.exam, '60')
+        other = Subject.objects.create(code='SCI1', name='Science', units=3, year_level=1)
+        Enrollment.objects.create(student=self.students[0], subject=other)
+
+        response = self.client.get(reverse('student-grades', args=[self.students[0].id]))
+
+        self.assertEqual(response.json(), [
+            {'subject_code': 'MATH1', 'subject_name': 'Mathematics', 'final_grade': 70.0, 'status': 'Needs Improvement'},
+            {'subject_code': 'SCI1', 'subject_name': 'Science', 'final_grade': 0, 'status': 'No grades yet'},
+        ])
+
+    def test_many_students_in_one_query_count(self):
+        for student in self.students:
+            self.grade(student, self.exam, '90')
+        ids = ','.join(str(student.id) for student in self.students)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('many-student-grades'), {'students': ids})
+        self.assertEqual([row['grades'][0]['final_grade'] for row in response.json()], [90.0] * 3)
+
+        more = self.create_students(3, start=10)
+        ids += ',' + ','.join(str(student.id) for student in more)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(reverse('many-student-grades'), {'students': ids})
+        self.assertEqual(len(response.json()), 6)
+
+        for students in ('', '1,x'):
+            response = self.client.get(reverse('many-student-grades'), {'students': students})
+            self.assertEqual(response.status_code, 400)
+
+
+class DashboardStatsTests(GradesTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.delete(DASHBOARD_STATS_KEY)
+        self.addCleanup(cache.delete, DASHBOARD_STATS_KEY)
+
+    def stats(self):
+        return self.client.get(reverse('dashboard-stats')).json()
+
+    def test_counts_by_year_level(self):
+        stats = self.stats()
+        self.assertEqual((stats['total_students'], stats['total_subjects'], stats['total_sections']), (3, 1, 1))
+        self.assertEqual(stats['total_enrollments'], 3)
+        self.assertEqual(stats['year_level_stats'][0]['averagePerSection'], 3.0)
+        self.assertEqual(stats['subject_stats'][0]['totalUnits'], 3)
+
+    def test_cache_is_dropped_after_the_write_commits(self):
+        self.assertEqual(self.stats()['total_students'], 3)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_students(1, start=10)
+            # Still cached until the transaction commits.
+            self.assertEqual(self.stats()['total_students'], 3)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self.stats()['total_students'], 4)
+
+
+class AssessmentBatchTests(GradesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = Subject.objects.create(code='MATH2', name='Mathematics 2', units=3, year_level=1)
+
+    def test_bulk_create_is_all_or_nothing(self):
+        response = self.client.post(reverse('bulk-create-assessments'), {'assessments': [
+            {'name': 'Quiz 2', 'subject': self.subject.pk, 'assessment_type': 'quiz', 'max_score': 20},
+            {'name': 'Quiz 3', 'subject': 999999, 'assessment_type': 'quiz', 'max_score': 20},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Assessment.objects.filter(name='Quiz 2').exists())
+
+    def test_bulk_create(self):
+        response = self.client.post(reverse('bulk-create-assessments'), {'assessments': [
+            {'name': 'Quiz 2', 'subject': self.subject.pk, 'assessment_type': 'quiz', 'max_score': 20},
+            {'name': 'Exam 2', 'subject': self.other.pk, 'assessment_type': 'exam', 'max_score': 100},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['assessments']), 2)
+        self.assertTrue(Assessment.objects.filter(subject=self.other, name='Exam 2').exists())
+
+    def test_clone_filters_by_type_and_skips_existing(self):
+        Assessment.objects.create(name='Quiz 1', subject=self.other, assessment_type='quiz', max_score=Decimal('20'))
+
+        response = self.client.post(reverse('clone-assessments'), {
+            'source_subject': self.subject.pk,
+            'target_subjects': [self.other.pk],
+            'assessment_types': ['quiz', 'exam'],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(Assessment.objects.filter(subject=self.other).values_list('name', flat=True)),
+            ['Exam 1', 'Quiz 1']
+        )
+
+    def test_clone_rejects_source_as_target(self):
+        response = self.client.post(reverse('clone-assessments'), {
+            'source_subject': self.subject.pk, 'target_subjects': [self.subject.pk],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+
+class GradebookEventsTests(GradesTestCase):
+    def events_request(self, **params):
+        return RequestFactory().get(
+            reverse('gradebook-events', args=[self.section.pk, self.subject.pk]), params
+        )
+
+    def stream_token(self, section=None):
+        response = self.client.post(reverse(
+            'gradebook-events-token', args=[(section or self.section).pk, self.subject.pk]
+        ))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['token']
+
+    def test_stream_token_is_bound_to_one_gradebook(self):
+        other = Section.objects.create(name='2', year_level=1)
+        token = self.stream_token()
+
+        self.assertEqual(stream_token_user_id(token, self.section.pk, self.subject.pk), self.user.pk)
+        self.assertIsNone(stream_token_user_id(token, other.pk, self.subject.pk))
+        self.assertIsNone(stream_token_user_id(self.stream_token(other), self.section.pk, self.subject.pk))
+
+    def test_stream_token_expires(self):
+        token = self.stream_token()
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + STREAM_TOKEN_MAX_AGE + 1):
+            self.assertIsNone(stream_token_user_id(token, self.section.pk, self.subject.pk))
+
+    def test_access_token_is_not_accepted_in_the_url(self):
+        access = str(RefreshToken.for_user(self.user).access_token)
+        self.assertIsNone(authenticate_event_stream(
+            self.events_request(token=access), self.section.pk, self.subject.pk
+        ))
+
+    async def test_stream_rejects_missing_credentials(self):
+        response = await gradebook_events(self.events_request(), self.section.pk, self.subject.pk)
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_delivers_published_grades(self):
+        token = await sync_to_async(self.stream_token)()
+        response = await gradebook_events(
+            self.events_request(token=token), self.section.pk, self.subject.pk
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+            get_broker().publish(gradebook_channel(self.section.pk, self.subject.pk), '{"grades":[]}')
+            self.assertEqual(await anext(stream), b'event: grades\ndata: {"grades":[]}\n\n')
+        finally:
+            await stream.aclose()
+
+    def test_grade_changes_are_published_per_section_after_commit(self):
+        with mock.patch.object(get_broker(), 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                publish_grade_changes(self.subject.pk, [(self.students[0].pk, self.quiz.pk, Decimal('15.00'))])
+
+        publish.assert_called_once_with(
+            gradebook_channel(self.section.pk, self.subject.pk),
+            f'{{"subject":{self.subject.pk},"grades":[[{self.students[0].pk},{self.quiz.pk},"15.00"]]}}'
+        )
+
+
+class RankingTests(GradesTestCase):
+    def setUp(self):
+        super().setUp()
+        for student, percent in zip(self.students, (90, 70, 70)):
+            for assessment in (self.activity, self.quiz, self.exam):
+                self.grade(student, assessment, assessment.max_score * percent / 100)
+
+    def rankings(self, **params):
+        return self.client.get(reverse('class-rankings', args=[self.subject.pk]), params)
+
+    def test_ranks_with_ties(self):
+        results = self.rankings().json()['results']
+
+        self.assertEqual(
+            [(row['student_id'], row['rank'], row['dense_rank'], row['percentile']) for row in results],
+            [
+                (self.students[0].pk, 1, 1, 100.0),
+                (self.students[1].pk, 2, 2, 50.0),
+                (self.students[2].pk, 2, 2, 50.0),
+            ]
+        )
+
+    def test_year_level_scope_ranks_across_sections(self):
+        other = Section.objects.create(name='2', year_level=1)
+        student = self.create_students(1, section=other, start=10)[0]
+        for assessment in (self.activity, self.quiz, self.exam):
+            self.grade(student, assessment, assessment.max_score)
+
+        by_section = {row['student_id']: row['rank'] for row in self.rankings().json()['results']}
+        by_year = {row['student_id']: row['rank'] for row in self.rankings(scope='year_level').json()['results']}
+
+        self.assertEqual((by_section[student.pk], by_section[self.students[0].pk]), (1, 1))
+        self.assertEqual((by_year[student.pk], by_year[self.students[0].pk]), (1, 2))
+
+    def test_top_keeps_ties(self):
+        results = self.rankings(top=2).json()['results']
+        self.assertEqual(len(results), 3)
+        self.assertEqual([row['rank'] for row in self.rankings(top=1).json()['results']], [1])
+
+    def test_invalid_parameters(self):
+        for params in ({'top': 0}, {'top': 'x'}, {'scope': 'school'}, {'section': 'x'}):
+            self.assertEqual(self.rankings(**params).status_code, 400, params)
+
+
+class WeightSimulationTests(GradesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.grade(self.students[0], self.activity, Decimal('50'))
+        self.grade(self.students[0], self.quiz, Decimal('10'))
+        self.grade(self.students[0], self.exam, Decimal('60'))
+        self.grade(self.students[1], self.exam, Decimal('80'))
+
+    def simulate(self, *options, **data):
+        return self.client.post(reverse('simulate-weights', args=[self.subject.pk]), {
+            'weights': [
+                {'activity_weight': activity, 'quiz_weight': quiz, 'exam_weight': exam}
+                for activity, quiz, exam in options
+            ],
+            **data
+        }, format='json')
+
+    def test_rescales_missing_categories(self):
+        response = self.simulate((100, 0, 0), (0, 0, 100), (20, 30, 50), include_students=True)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        # The ungraded third student has no stored final grade to simulate.
+        self.assertEqual(data['student_ids'], [self.students[0].pk, self.students[1].pk])
+        self.assertEqual(
+            [scenario['final_grades'] for scenario in data['scenarios']],
+            [[100.0, None], [60.0, 80.0], [65.0, 80.0]]
+        )
+        self.assertEqual(data['scenarios'][2]['graded'], 2)
+
+    def test_current_weights_change_nothing(self):
+        current = self.simulate((100, 0, 0)).json()['current_weights']
+
+        scenario = self.simulate((current['activity'], current['quiz'], current['exam'])).json()['scenarios'][0]
+
+        self.assertEqual(scenario['mean_change'], 0.0)
+        self.assertEqual((scenario['newly_passing'], scenario['newly_failing']), (0, 0))
+
+    def test_nothing_is_saved(self):
+        before = list(FinalGrade.objects.order_by('pk').values_list('final_grade', flat=True))
+        self.simulate((0, 0, 100))
+        self.assertEqual(list(FinalGrade.objects.order_by('pk').values_list('final_grade', flat=True)), before)
+
+    def test_options_must_sum_to_100(self):
+        self.assertEqual(self.simulate((50, 0, 0)).status_code, 400)
+
+
+class GradeChangeTests(GradesTestCase):
+    def test_as_of_returns_the_score_in_effect(self):
+        student = self.students[0]
+        grade = self.grade(student, self.activity, '30')
+        before_update = timezone.now()
+        grade.score = Decimal('45')
+        grade.save()
+        before_delete = timezone.now()
+        grade.delete()
+
+        history = GradeChange.objects.filter(student=student, assessment=self.activity)
+        self.assertEqual(
+            list(history.order_by('changed_at', 'pk').values_list('score', flat=True)),
+            [Decimal('30'), Decimal('45'), None]
+        )
+        as_of = lambda moment: list(history.as_of(moment).values_list('score', flat=True))
+        self.assertEqual(as_of(before_update), [Decimal('30')])
+        self.assertEqual(as_of(before_delete), [Decimal('45')])
+        self.assertEqual(as_of(timezone.now()), [None])
+
+    def test_gradebook_as_of(self):
+        student = self.students[0]
+        grade = self.grade(student, self.activity, '30')
+        moment = timezone.now()
+        grade.score = Decimal('45')
+        grade.save()
+
+        response = self.client.get(
+            reverse('gradebook', args=[self.section.id]),
+            {'subject': self.subject.id, 'as_of': moment.isoformat()}
+        )
+        row = next(row for row in response.json() if row['student_id'] == student.id)
+        self.assertEqual(Decimal(row['grades']['Activity 1']), Decimal('30'))
+
+    def test_history_is_always_paginated(self):
+        student = self.students[0]
+        grade = self.grade(student, self.activity, '30')
+        for score in ('35', '40'):
+            grade.score = Decimal(score)
+            grade.save()
+
+        url = reverse('grade-history')
+        first = self.client.get(url, {'student': student.id}).json()
+        self.assertEqual(Decimal(first['results'][0]['score']), Decimal('40'))
+        self.assertEqual(len(first['results']), 3)
+        self.assertIsNone(first['next_cursor'])
+
+        page = self.client.get(url, {'student': student.id, 'limit': 2}).json()
+        rest = self.client.get(url, {'student': student.id, 'limit': 2, 'cursor': page['next_cursor']}).json()
+        self.assertEqual(
+            [row['id'] for row in page['results'] + rest['results']],
+            [row['id'] for row in first['results']]
+        )
+
+    def test_history_requires_a_filter(self):
+        self.assertEqual(self.client.get(reverse('grade-history')).status_code, 400)
+
+
+class TranscriptTests(GradesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.science = Subject.objects.create(code='SCI1', name='Science', units=2, year_level=1)
+        Enrollment.objects.create(student=cls.students[0], subject=cls.science)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def transcript(self, student):
+        response = self.client.get(reverse('student-transcript', args=[student.id]))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_units_weighted_gpa_over_graded_subjects(self):
+        student = self.students[0]
+        for assessment in (self.activity, self.quiz, self.exam):
+            self.grade(student, assessment, assessment.max_score * Decimal('0.9'))
+
+        transcript = self.transcript(student)
+
+        self.assertEqual([row['subject_code'] for row in transcript['subjects']], ['MATH1', 'SCI1'])
+        self.assertEqual(transcript['subjects'][1]['status'], 'No grades yet')
+        self.assertEqual((transcript['total_units'], transcript['graded_units'], transcript['earned_units']), (5, 3, 3))
+        self.assertEqual(transcript['gpa'], transcript['subjects'][0]['final_grade'])
+
+    def test_cached_until_a_grade_changes(self):
+        student = self.students[0]
+        self.assertIsNone(self.transcript(student)['gpa'])
+
+        with self.assertNumQueries(0):
+            get_transcripts([student.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grade(student, self.exam, '80')
+
+        self.assertEqual(self.transcript(student)['gpa'], 80.0)
+
+    def test_section_transcripts(self):
+        response = self.client.get(reverse('section-transcripts', args=[self.section.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['student_id'] for row in response.json()], [student.id for student in self.students])
+        self.assertEqual([row['total_units'] for row in response.json()], [5, 3, 3])
+
+
+class ReportCardTests(GradesTestCase):
+    def test_cards_of_non_numeric_sections(self):
+        section = Section.objects.create(name='Sampaguita', year_level=2)
+        student = self.create_students(1, section=section, start=10)[0]
+        self.grade(student, self.exam, '80')
+
+        card = report_card_data(list(report_card_students(section=section.id)))[0]
+
+        self.assertEqual(card['section_label'], 'Year 2 - Section Sampaguita')
+        self.assertEqual(card['gpa'], 80.0)
+        files = dict(render_report_card(card, ['html', 'csv']))
+        self.assertEqual(set(files), {'2-Sampaguita/S00010-00010_Student.html', '2-Sampaguita/S00010-00010_Student.csv'})
+        self.assertIn(b'Year 2 - Section Sampaguita', files['2-Sampaguita/S00010-00010_Student.html'])
+
+    def test_students_are_chosen_by_section_or_year_level(self):
+        other = Section.objects.create(name='B', year_level=2)
+        moved = self.create_students(1, section=other, start=10)
+
+        self.assertEqual(list(report_card_students(year_level=2)), moved)
+        self.assertEqual(list(report_card_students(section=self.section.id)), self.students)
+        self.assertEqual(report_card_students().count(), 4)
+
+    def test_request_is_queued_as_a_job(self):
+        response = self.client.post(reverse('generate-report-cards'), {'formats': ['csv']}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['kind'], Job.REPORT_CARDS)
+        self.assertEqual(response.json()['params']['formats'], ['csv'])
+
+
+class GradeAggregateTests(GradesTestCase):
+    def assertAggregate(self, section, assessment, count, scores=None):
+        rows = GradeAggregate.objects.filter(section=section, assessment=assessment)
+        if not count:
+            self.assertFalse(rows.exists())
+            return
+        row = rows.get()
+        self.assertEqual(row.count, count)
+        self.assertAlmostEqual(row.score_sum, sum(scores))
+        self.assertAlmostEqual(row.score_sq_sum, sum(score * score for score in scores))
+        self.assertAlmostEqual(row.score_min, min(scores))
+        self.assertAlmostEqual(row.score_max, max(scores))
+        self.assertEqual(row.pass_count, sum(score >= 75 for score in scores))
+
+    def test_grade_writes_refresh_their_cell(self):
+        first, second, third = self.students
+        self.grade(first, self.activity, '40')
+        grade = self.grade(second, self.activity, '25')
+        self.assertAggregate(self.section, self.activity, 2, [80, 50])
+
+        grade.score = Decimal('50')
+        grade.save()
+        self.assertAggregate(self.section, self.activity, 2, [80, 100])
+
+        grade.delete()
+        self.assertAggregate(self.section, self.activity, 1, [80])
+
+    def test_grade_writes_leave_other_sections_alone(self):
+        other = Section.objects.create(name='2', year_level=1)
+        outsider = self.create_students(1, section=other, start=10)[0]
+        self.grade(outsider, self.activity, '10')
+        untouched = GradeAggregate.objects.get(section=other).updated_at
+
+        self.grade(self.students[0], self.activity, '40')
+
+        self.assertEqual(GradeAggregate.objects.get(section=other).updated_at, untouched)
+        self.assertAggregate(self.section, self.activity, 1, [80])
+
+    def test_moving_a_student_moves_their_grades(self):
+        other = Section.objects.create(name='2', year_level=2)
+        self.grade(self.students[0], self.activity, '40')
+        self.grade(self.students[1], self.activity, '25')
+
+        self.students[1].section = other
+        self.students[1].save()
+        self.assertAggregate(self.section, self.activity, 1, [80])
+        self.assertAggregate(other, self.activity, 1, [50])
+
+        other.year_level = 3
+        other.save()
+        self.assertEqual(GradeAggregate.objects.get(section=other).year_level, 3)
+
+    def test_saving_a_student_in_place_leaves_aggregates_alone(self):
+        self.grade(self.students[0], self.activity, '40')
+        untouched = GradeAggregate.objects.get(section=self.section).updated_at
+
+        self.students[0].first_name = 'Renamed'
+        with self.assertNumQueries(2):
+            self.students[0].save()
+
+        self.assertEqual(GradeAggregate.objects.get(section=self.section).updated_at, untouched)
+
+    def test_moving_a_student_out_of_every_section(self):
+        self.grade(self.students[0], self.activity, '40')
+
+        self.students[0].section = None
+        self.students[0].save()
+
+        self.assertAggregate(self.section, self.activity, 0)
+
+    def test_roll_up_matches_raw_grades(self):
+        other = Section.objects.create(name='2', year_level=1)
+        second_section = self.create_students(2, section=other, start=10)
+        scores = [('10', '10'), ('20', '80'), ('30', '95'), ('50', '60'), (None, '75')]
+        for student, (activity, exam) in zip(self.students + second_section, scores):
+            if activity is not None:
+                self.grade(student, self.activity, activity)
+            self.grade(student, self.exam, exam)
+
+        response = self.client.get(reverse('grade-analytics'), {'group_by': 'year_level,assessment_type'})
+        self.assertEqual(response.status_code, 200)
+        results = {row['assessment_type']: row for row in response.json()['results']}
+
+        activity = [20, 40, 60, 100]
+        self.assertEqual(results['activity']['count'], 4)
+        self.assertEqual(results['activity']['mean'], 55)
+        self.assertEqual(results['activity']['std'], round(float(np.std(activity)), 2))
+        self.assertEqual(results['activity']['pass_rate'], 25)
+        self.assertEqual(results['exam']['count'], 5)
+        self.assertEqual(results['exam']['min'], 10)
+        self.assertEqual(results['exam']['max'], 95)
+        self.assertEqual(results['exam']['pass_rate'], 60)
+
+        response = self.client.get(reverse('grade-analytics'), {'group_by': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CurveTests(GradesTestCase):
+    def test_uncapped_curve_stays_within_stored_range(self):
+        curved = curve_scores(np.array([10.0, 45.0]), 'add', 50, points=2000, cap=False)
+        self.assertTrue((curved <= MAX_STORED_SCORE).all())
+
+    def test_capped_curve_clamps_to_max_score(self):
+        for student, score in zip(self.students, ('10', '45', '50')):
+            Grade.objects.create(student=student, assessment=self.activity, score=Decimal(score))
+
+        response = self.client.post(
+            reverse('curve-assessment', args=[self.activity.id]), {'method': 'add', 'points': 10}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(Grade.objects.filter(assessment=self.activity).values_list('score', flat=True)),
+            [Decimal('20'), Decimal('50'), Decimal('50')]
+        )
+
+    def test_uncapped_curve_above_max_score_is_rejected(self):
+        for student, score in zip(self.students, ('10', '45', '50')):
+            Grade.objects.create(student=student, assessment=self.activity, score=Decimal(score))
+
+        response = self.client.post(
+            reverse('curve-assessment', args=[self.activity.id]),
+            {'method': 'add', 'points': 10, 'cap': False},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            sorted(Grade.objects.filter(assessment=self.activity).values_list('score', flat=True)),
+            [Decimal('10'), Decimal('45'), Decimal('50')]
+        )
+
+    def curve(self, **data):
+        for student, score in zip(self.students, ('10', '20', '30')):
+            Grade.objects.update_or_create(student=student, assessment=self.activity, defaults={'score': Decimal(score)})
+        return self.client.post(reverse('curve-assessment', args=[self.activity.id]), data, format='json')
+
+    def curved_scores(self):
+        return [
+            Grade.objects.get(student=student, assessment=self.activity).score
+            for student in self.students
+        ]
+
+    def test_add(self):
+        self.assertEqual(self.curve(method='add', points=-5).status_code, 200)
+        self.assertEqual(self.curved_scores(), [Decimal('5'), Decimal('15'), Decimal('25')])
+
+    def test_scale(self):
+        self.assertEqual(self.curve(method='scale', target_mean=30).status_code, 200)
+        self.assertEqual(self.curved_scores(), [Decimal('15'), Decimal('30'), Decimal('45')])
+
+    def test_zscore(self):
+        self.assertEqual(self.curve(method='zscore', target_mean=25).status_code, 200)
+        self.assertEqual(self.curved_scores(), [Decimal('15'), Decimal('25'), Decimal('35')])
+
+        response = self.curve(method='zscore', target_mean=25, target_std=0, dry_run=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.curved_scores(), [Decimal('10'), Decimal('20'), Decimal('30')])
+
+    def test_non_finite_and_out_of_range_options_are_rejected(self):
+        for data in (
+            {'method': 'add', 'points': 'nan'},
+            {'method': 'add', 'points': '-inf'},
+            {'method': 'add', 'points': 51},
+            {'method': 'scale', 'target_mean': 'Infinity'},
+            {'method': 'zscore', 'target_mean': 25, 'target_std': 'nan'},
+            {'method': 'zscore', 'target_mean': 25, 'target_std': 1e308},
+        ):
+            self.assertEqual(self.curve(**data).status_code, 400, data)
+        self.assertEqual(self.curved_scores(), [Decimal('10'), Decimal('20'), Decimal('30')])
+
+
+class KeysetPaginationTests(GradesTestCase):
+    def test_cursor_walks_every_row_once_in_order(self):
+        # Ties and NULL dates must neither repeat nor skip rows between pages.
+        for index in range(5):
+            Assessment.objects.create(
+                name=f'Quiz {index + 2}', subject=self.subject, assessment_type='quiz',
+                max_score=Decimal('10'), date=date(2025, 1, 1) if index % 2 else None
+            )
+        expected = [
+            row['id'] for row in self.client.get(reverse('assessment-list-create'), {'ordering': '-date'}).json()
+        ]
+
+        seen, params = [], {'ordering': '-date', 'limit': 2}
+        while True:
+            page = self.client.get(reverse('assessment-list-create'), params).json()
+            seen += [row['id'] for row in page['results']]
+            if not page['next_cursor']:
+                break
+            params['cursor'] = page['next_cursor']
+
+        self.assertEqual(len(expected), Assessment.objects.count())
+        self.assertEqual(seen, expected)
+
+    def test_cursor_with_invalid_values_is_rejected(self):
+        # '["x",1]': decodes, but "x" is not a datetime.
+        for cursor in ('WyJ4IiwxXQ==', 'not-base64', 'WzFd'):
+            response = self.client.get(reverse('grade-history'), {'student': self.students[0].id, 'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertIn('cursor', response.json())
+
+
+class ImportTests(GradesTestCase):
+    def csv_file(self, rows):
+        lines = ['Student ID,Subject Code,Assessment,Score'] + [','.join(row) for row in rows]
+        return io.BytesIO('\n'.join(lines).encode())
+
+    def test_rows_are_classified_across_batches(self):
+        first, second, third = self.students
+        self.grade(first, self.quiz, '10')
+        self.grade(second, self.quiz, '12')
+        file = self.csv_file([
+            (first.student_id, 'MATH1', 'Quiz 1', '15'),
+            (second.student_id, 'MATH1', 'Quiz 1', '12'),
+            (third.student_id, 'MATH1', 'Quiz 1', '5'),
+            ('NOPE', 'MATH1', 'Quiz 1', '5'),
+            (first.student_id, 'MATH1', 'Exam 1', '150'),
+            (third.student_id, 'MATH1', 'Quiz 1', '6'),
+        ])
+
+        written = []
+        summary = plan_import(file, write=lambda entries: written.append(len(entries)), batch_size=2)
+
+        self.assertEqual(summary['rows'], 6)
+        self.assertEqual(summary['counts'], {'new': 1, 'changed': 1, 'unchanged': 1, 'invalid': 3})
+        self.assertEqual(
+            [(entry['row'], entry['error']) for entry in summary['preview']['invalid']],
+            [(4, 'Superseded by row 7'), (5, 'Student NOPE not found'),
+             (6, "Score (150.00) cannot exceed the assessment's maximum score (100.00)")]
+        )
+        self.assertEqual(summary['preview']['new'][0]['score'], Decimal('6'))
+        # Nothing is written without a writer; with one, each batch's writes.
+        self.assertEqual(Grade.objects.get(student=first, assessment=self.quiz).score, Decimal('10'))
+        self.assertEqual(written, [1, 1])
+
+    def upload(self, file):
+        file.name = 'grades.csv'
+        return self.client.post(reverse('import-grades'), {'file': file}, format='multipart')
+
+    def run_job(self, job, task):
+        # What the background pool does, inline.
+        result = task(job, lambda processed, total=None: None)
+        Job.objects.filter(pk=job.pk).update(status=Job.SUCCEEDED, result=result)
+        return result
+
+    def test_preview_and_apply_run_as_jobs(self):
+        file = self.csv_file([(self.students[0].student_id, 'MATH1', 'Quiz 1', '15')])
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            response = self.upload(file)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()['status'], Job.QUEUED)
+            job = Job.objects.get(pk=response.json()['id'])
+
+            apply_url = reverse('apply-import', args=[job.pk])
+            # Not previewed yet.
+            self.assertEqual(self.client.post(apply_url).status_code, 409)
+
+            summary = self.run_job(job, preview_import)
+            self.assertEqual(summary['counts']['new'], 1)
+            self.assertFalse(Grade.objects.exists())
+
+            response = self.client.post(apply_url)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()['params']['stage'], 'apply')
+            self.run_job(Job.objects.get(pk=job.pk), run_import)
+            self.assertEqual(Grade.objects.get(student=self.students[0], assessment=self.quiz).score, Decimal('15'))
+
+            # Applying twice is refused.
+            self.assertEqual(self.client.post(apply_url).status_code, 409)
+
+    def test_unreadable_upload_is_rejected_up_front(self):
+        response = self.upload(io.BytesIO(b'Name,Value\nx,1\n'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+
+class AtRiskTests(GradesTestCase):
+    def test_non_numeric_thresholds_are_rejected(self):
+        for threshold in ('abc', 'NaN', 'Infinity', '101'):
+            response = self.client.get(reverse('at-risk-students'), {'threshold': threshold})
+            self.assertEqual(response.status_code, 400, threshold)
@@ -0,0 +1,79 @@
+# backend/apps/grades/transcripts.py
+from decimal import Decimal
+
+from django.db.models import DecimalField, Exists, ExpressionWrapper, F, OuterRef, Subquery, Sum
+
+from apps.subjects.models import Enrollment
+from .caching import TRANSCRIPT_TIMEOUT, get_many_cached, transcript_key
+from .calculations import PASSING_GRADE, TWO_PLACES, get_grade_status
+from .models import FinalGrade
+
+
+def compute_transcripts(student_ids):
+    """
+    Transcripts of the given students in two queries: their active
+    enrollments with the stored final grades, and the units-weighted GPA
+    aggregated per student in the database.
+    """
+    final_grades = FinalGrade.objects.filter(
+        student_id=OuterRef('student_id'),
+        subject_id=OuterRef('subject_id')
+    )
+    enrollments = Enrollment.objects.filter(
+        student_id__in=student_ids,
+        is_active=True
+    ).annotate(
+        final_grade=Subquery(final_grades.values('final_grade')[:1])
+    ).values(
+        'student_id', 'subject_id', 'subject__code', 'subject__name',
+        'subject__units', 'subject__year_level', 'final_grade'
+    ).order_by('student_id', 'subject__year_level', 'subject__code')
+
+    transcripts = {
+        student_id: {'subjects': [], 'total_units': 0, 'graded_units': 0, 'earned_units': 0, 'gpa': None}
+        for student_id in student_ids
+    }
+    for row in enrollments:
+        transcript = transcripts[row['student_id']]
+        final_grade = row['final_grade']
+        passed = final_grade is not None and final_grade >= PASSING_GRADE
+        transcript['subjects'].append({
+            'subject_id': row['subject_id'],
+            'subject_code': row['subject__code'],
+            'subject_name': row['subject__name'],
+            'year_level': row['subject__year_level'],
+            'units': row['subject__units'],
+            'final_grade': float(final_grade) if final_grade is not None else None,
+            'status': get_grade_status(final_grade, 100) if final_grade is not None else 'No grades yet',
+            'passed': passed
+        })
+        transcript['total_units'] += row['subject__units']
+        if passed:
+            transcript['earned_units'] += row['subject__units']
+
+    gpa_rows = FinalGrade.objects.filter(
+        student_id__in=student_ids,
+        final_grade__isnull=False
+    ).filter(Exists(Enrollment.objects.filter(
+        student_id=OuterRef('student_id'),
+        subject_id=OuterRef('subject_id'),
+        is_active=True
+    ))).values('student_id').annotate(
+        units=Sum('subject__units'),
+        weighted=Sum(ExpressionWrapper(
+            F('final_grade') * F('subject__units'),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ))
+    ).order_by()
+    for row in gpa_rows:
+        if row['units']:
+            transcript = transcripts[row['student_id']]
+            transcript['graded_units'] = row['units']
+            transcript['gpa'] = float((Decimal(row['weighted']) / row['units']).quantize(TWO_PLACES))
+
+    return transcripts
+
+
+def get_transcripts(student_ids):
+    """Transcripts keyed by student ID, served from the per-student cache."""
+    return get_many_cached(student_ids, transcript_key, compute_transcripts, TRANSCRIPT_TIMEOUT)
@@ -7,9 +7,33 @@ urlpatterns = [
     path('quizzes/', views.quizzes_view, name='quizzes'),
     path('exams/', views.exams_view, name='exams'),
     path('gradebook/<int:section_id>/', views.gradebook_view, name='gradebook'),
+    path('gradebook/<int:section_id>/<int:subject_id>/events/', views.gradebook_events, name='gradebook-events'),
+    path('gradebook/<int:section_id>/<int:subject_id>/events/token/', views.gradebook_events_token, name='gradebook-events-token'),
     path('assessments/', views.assessment_list_create, name='assessment-list-create'),
+    path('assessments/bulk/', views.bulk_create_assessments, name='bulk-create-assessments'),
+    path('assessments/clone/', views.clone_assessments, name='clone-assessments'),
     path('assessments/<int:pk>/', views.assessment_detail, name='assessment-detail'),
+    path('assessments/<int:pk>/curve/', views.curve_assessment, name='curve-assessment'),
+    path('grades/', views.grade_list_create, name='grade-list-create'),
+    path('student-grades/', views.get_many_student_grades, name='many-student-grades'),
     path('student-grades/<int:student_id>/', views.get_student_grades, name='student-grades'),
+    path('transcripts/<int:student_id>/', views.student_transcript, name='student-transcript'),
+    path('transcripts/section/<int:section_id>/', views.section_transcripts, name='section-transcripts'),
+    path('final-grades/<int:section_id>/', views.section_final_grades, name='section-final-grades'),
+    path('statistics/<int:subject_id>/', views.subject_statistics, name='subject-statistics'),
+    path('simulate-weights/<int:subject_id>/', views.simulate_weights_view, name='simulate-weights'),
+    path('at-risk/', views.at_risk_students, name='at-risk-students'),
+    path('analytics/', views.grade_analytics, name='grade-analytics'),
+    path('rankings/<int:subject_id>/', views.class_rankings, name='class-rankings'),
+    path('export/<int:section_id>/', views.export_grades, name='export-grades'),
+    path('export/year-level/<int:year_level>/', views.export_year_level_grades, name='export-year-level-grades'),
+    path('history/', views.grade_history, name='grade-history'),
+    path('as-of/', views.grades_as_of, name='grades-as-of'),
+    path('import/', views.import_grades, name='import-grades'),
+    path('import/<int:job_id>/apply/', views.apply_import, name='apply-import'),
+    path('jobs/<int:job_id>/', views.job_status, name='job-status'),
+    path('jobs/<int:job_id>/download/', views.download_job_file, name='download-job-file'),
+    path('report-cards/', views.generate_report_cards_view, name='generate-report-cards'),
     path('update/', views.update_grade, name='update-grade'),
     path('bulk-update/', views.bulk_update_grades, name='bulk-update-grades'),
 ]
\ No newline at end of file
@@ -1,36 +1,212 @@
 # backend/apps/grades/views.py
+import os
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
-from .models import Assessment, Grade
-from .serializers import AssessmentSerializer, GradeSerializer, GradeBookSerializer, BulkGradeUpdateSerializer
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Assessment, Grade, FinalGrade, GradeAggregate, GradeChange, Job
+from .serializers import (
+    AssessmentSerializer, GradeSerializer, GradeBookSerializer, BulkGradeUpdateSerializer, BulkGradeRowSerializer,
+    BulkAssessmentCreateSerializer, CloneAssessmentsSerializer, WeightSimulationSerializer, JobSerializer,
+    CurveSerializer, ReportCardRequestSerializer
+)
+from .gradebook import (
+    build_gradebook, build_student_row, build_windowed_gradebook, columnar_gradebook, fetch_gradebook,
+    gradebook_students
+)
+from .pagination import KeysetPagination
+from .events import (
+    STREAM_TOKEN_MAX_AGE, event_stream, gradebook_channel, issue_stream_token, stream_token_user_id
+)
+from .exports import EXPORT_FORMATS, export_rows, iterate_async, section_grades, year_level_grades
+from .distributions import DEFAULT_BINS, assessment_statistics
+from .analytics import ANALYTICS_DIMENSIONS, roll_up
+from .simulations import simulate_weights
+from .curves import curve_scores, curve_summary, load_assessment_scores
+from .writes import upsert_grades
+from .transcripts import get_transcripts
+from .imports import PREVIEW, APPLY, ImportFormatError, check_format, preview_import, run_import
+from .jobs import submit_job
+from .report_cards import run_report_cards
+from .caching import (
+    DASHBOARD_STATS_FRESH_FOR, DASHBOARD_STATS_KEY, DASHBOARD_STATS_STALE_FOR, stale_while_revalidate
+)
+from .calculations import PASSING_GRADE, final_grade_summary, get_grade_status, subject_weights, weighted_final_grade
 from apps.students.models import Student, Section
-from apps.subjects.models import Subject, Enrollment
-from django.db.models import Sum
+from apps.subjects.models import Subject, Enrollment, GradeWeight
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Sum, Window
+from django.db.models.functions import DenseRank, PercentRank, Rank
+
+ASSESSMENT_ORDERINGS = {
+    'date': ['date', 'name'],
+    '-date': ['-date', 'name'],
+    'name': ['name'],
+    '-name': ['-name'],
+    'created_at': ['created_at'],
+    '-created_at': ['-created_at'],
+}
+
+def query_int(params, name, default=None, min_value=None, max_value=None):
+    """
+    Integer query parameter, or default when it is absent or empty.
+    Anything else that is not an integer within the bounds is a 400.
+    """
+    value = params.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: 'Must be an integer.'})
+    if min_value is not None and value < min_value:
+        raise ValidationError({name: f'Must be at least {min_value}.'})
+    if max_value is not None and value > max_value:
+        raise ValidationError({name: f'Must be at most {max_value}.'})
+    return value
+
+def filter_assessments(params, assessment_type=None):
+    """
+    Assessments matching the list query parameters:
+    type, subject, date_from and date_to (YYYY-MM-DD).
+    """
+    assessments = Assessment.objects.select_related('subject')
+
+    assessment_type = assessment_type or params.get('type')
+    if assessment_type:
+        if assessment_type not in dict(Assessment.TYPES):
+            raise ValidationError({'type': f"Must be one of: {', '.join(dict(Assessment.TYPES))}"})
+        assessments = assessments.filter(assessment_type=assessment_type)
+
+    subject_id = query_int(params, 'subject')
+    if subject_id:
+        assessments = assessments.filter(subject_id=subject_id)
+
+    for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+        value = params.get(param)
+        if value:
+            try:
+                parsed = parse_date(value)
+            except ValueError:
+                parsed = None
+            if parsed is None:
+                raise ValidationError({param: 'Use the YYYY-MM-DD format.'})
+            assessments = assessments.filter(**{lookup: parsed})
+
+    return assessments
+
+def list_assessments(request, assessment_type=None):
+    """
+    Filtered assessment listing shared by every assessment endpoint.
+    Ordered by ?ordering= (date by default); ?limit= and ?cursor= switch
+    to keyset pagination.
+    """
+    ordering = request.query_params.get('ordering', 'date')
+    if ordering not in ASSESSMENT_ORDERINGS:
+        raise ValidationError({'ordering': f"Must be one of: {', '.join(ASSESSMENT_ORDERINGS)}"})
+
+    assessments = filter_assessments(request.query_params, assessment_type)
+    paginator = KeysetPagination(ASSESSMENT_ORDERINGS[ordering])
+    page = paginator.paginate_queryset(assessments, request)
+    if page is not None:
+        serializer = AssessmentSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    serializer = AssessmentSerializer(paginator.order(assessments), many=True)
+    return Response(serializer.data)
+
+def create_typed_assessment(request, assessment_type=None):
+    data = request.data.copy()
+    if assessment_type:
+        data['assessment_type'] = assessment_type
+    serializer = AssessmentSerializer(data=data)
+    if serializer.is_valid():
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def assessment_list_create(request):
-    """List all assessments or create a new assessment"""
+    """
+    List assessments or create a new assessment.
+    Query parameters (GET):
+    - type: activity, quiz or exam
+    - subject: subject ID
+    - date_from, date_to: inclusive date range (YYYY-MM-DD)
+    - ordering: date, name or created_at, optionally prefixed with '-'
+    - limit, cursor: keyset pagination; the response then holds results,
+      next_cursor and next
+    """
     if request.method == 'GET':
-        subject_id = request.query_params.get('subject')
-        assessments = Assessment.objects.all()
-        
-        if subject_id:
-            assessments = assessments.filter(subject_id=subject_id)
-            
-        serializer = AssessmentSerializer(assessments, many=True)
-        return Response(serializer.data)
-        
+        return list_assessments(request)
+
     elif request.method == 'POST':
-        serializer = AssessmentSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return create_typed_assessment(request)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_create_assessments(request):
+    """
+    Create many assessments in one transaction.
+    Expected payload:
+    {
+        "assessments": [
+            {"name": "Quiz 1", "subject": 1, "assessment_type": "quiz", "max_score": 20, "date": "2025-06-01"}
+        ]
+    }
+    Nothing is created unless every row is valid.
+    """
+    serializer = BulkAssessmentCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        assessments = serializer.save()
+
+    return Response({
+        'message': f'{len(assessments)} assessments created successfully',
+        'assessments': AssessmentSerializer(assessments, many=True).data
+    }, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def clone_assessments(request):
+    """
+    Copy the assessments of a source subject into many target subjects.
+    Expected payload:
+    {
+        "source_subject": 1,
+        "target_subjects": [2, 3, 4],
+        "assessment_types": ["quiz", "exam"],   (optional, all types by default)
+        "skip_existing": true                   (optional)
+    }
+    """
+    serializer = CloneAssessmentsSerializer(data=request.data)
+    if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    with transaction.atomic():
+        assessments = serializer.save()
+
+    return Response({
+        'message': f'{len(assessments)} assessments created successfully',
+        'assessments': AssessmentSerializer(assessments, many=True).data
+    }, status=status.HTTP_201_CREATED)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_assessment(request):
@@ -44,114 +220,136 @@ def create_assessment(request):
 @permission_classes([IsAuthenticated])
 def activities_view(request):
     if request.method == 'GET':
-        subject_id = request.query_params.get('subject')
-        activities = Assessment.objects.filter(
-            assessment_type='activity',
-            subject_id=subject_id
-        ) if subject_id else Assessment.objects.filter(assessment_type='activity')
-        serializer = AssessmentSerializer(activities, many=True)
-        return Response(serializer.data)
-        
+        return list_assessments(request, 'activity')
     elif request.method == 'POST':
-        data = request.data.copy()
-        data['assessment_type'] = 'activity'
-        serializer = AssessmentSerializer(data=data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return create_typed_assessment(request, 'activity')
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def quizzes_view(request):
     if request.method == 'GET':
-        subject_id = request.query_params.get('subject')
-        quizzes = Assessment.objects.filter(
-            assessment_type='quiz',
-            subject_id=subject_id
-        ) if subject_id else Assessment.objects.filter(assessment_type='quiz')
-        serializer = AssessmentSerializer(quizzes, many=True)
-        return Response(serializer.data)
-        
+        return list_assessments(request, 'quiz')
     elif request.method == 'POST':
-        data = request.data.copy()
-        data['assessment_type'] = 'quiz'
-        serializer = AssessmentSerializer(data=data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return create_typed_assessment(request, 'quiz')
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def exams_view(request):
     if request.method == 'GET':
-        subject_id = request.query_params.get('subject')
-        exams = Assessment.objects.filter(
-            assessment_type='exam',
-            subject_id=subject_id
-        ) if subject_id else Assessment.objects.filter(assessment_type='exam')
-        serializer = AssessmentSerializer(exams, many=True)
-        return Response(serializer.data)
-        
+        return list_assessments(request, 'exam')
     elif request.method == 'POST':
-        data = request.data.copy()
-        data['assessment_type'] = 'exam'
-        serializer = AssessmentSerializer(data=data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return create_typed_assessment(request, 'exam')
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def gradebook_view(request, section_id):
-    subject_id = request.GET.get('subject')
+    """
+    Gradebook of a section for ?subject=.
+    - as_of: ISO 8601 date or datetime to read scores from the grade history
+    - layout: rows (default), one dict per student keyed by assessment
+      name, or columnar, an assessments header with a students array and
+      a scores matrix
+    - limit, cursor: page students by last and first name; rows then come
+      under results with next_cursor and next
+    - type, date_from, date_to: only show matching assessments; totals and
+      averages still count every assessment
+    """
+    subject_id = query_int(request.GET, 'subject')
     if not subject_id:
         return Response({'error': 'Subject ID is required'}, status=status.HTTP_400_BAD_REQUEST)
     
+    as_of = None
+    if request.GET.get('as_of'):
+        as_of = parse_moment(request.GET['as_of'])
+        if as_of is None:
+            return Response({'error': 'as_of must be an ISO 8601 date or datetime'}, status=status.HTTP_400_BAD_REQUEST)
+
+    layout = request.GET.get('layout', 'rows')
+    if layout not in ('rows', 'columnar'):
+        return Response({'error': 'layout must be rows or columnar'}, status=status.HTTP_400_BAD_REQUEST)
+
     subject = get_object_or_404(Subject, pk=subject_id)
-    enrollments = Enrollment.objects.filter(
-        subject=subject,
-        student__section_id=section_id,
-        is_active=True
-    ).select_related('student')
-    
-    assessments = Assessment.objects.filter(subject=subject)
-    gradebook_data = []
-    
-    for enrollment in enrollments:
-        student = enrollment.student
-        grades = Grade.objects.filter(
-            student=student,
-            assessment__subject=subject
-        ).select_related('assessment')
-        
-        grade_dict = {}
-        total_score = 0
-        max_total = 0
-        
-        for assessment in assessments:
-            grade = grades.filter(assessment=assessment).first()
-            if grade:
-                grade_dict[assessment.name] = grade.score
-                total_score += grade.score
-            else:
-                grade_dict[assessment.name] = 0
-            max_total += assessment.max_score
-        
-        average = (total_score / max_total * 100) if max_total > 0 else 0
-        
-        gradebook_data.append({
-            'student_id': student.id,
-            'student_name': student.full_name,
-            'grades': grade_dict,
-            'total_score': total_score,
-            'average': round(average, 2)
-        })
+    params = request.GET
+    page_rows = 'limit' in params or 'cursor' in params
+    window_columns = any(params.get(key) for key in ('type', 'date_from', 'date_to'))
+
+    if page_rows or window_columns:
+        assessments = filter_assessments(params) if window_columns else None
+        students = None
+        if page_rows:
+            paginator = KeysetPagination(['last_name', 'first_name'])
+            students = paginator.paginate_queryset(gradebook_students(section_id, subject), request)
+
+        data = build_windowed_gradebook(section_id, subject, students, assessments, as_of, layout)
+        if not page_rows:
+            return Response(data)
+        if layout == 'columnar':
+            return Response({**data, 'next_cursor': paginator.get_next_cursor(), 'next': paginator.get_next_link()})
+        return paginator.get_paginated_response(data)
+
+    if layout == 'columnar':
+        return Response(columnar_gradebook(*fetch_gradebook(section_id, subject, as_of)))
+
+    gradebook_data = build_gradebook(section_id, subject, as_of)
     
     return Response(gradebook_data)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def gradebook_events_token(request, section_id, subject_id):
+    """
+    Issue a short-lived token for the grade event stream of one section and
+    subject. Browsers' EventSource cannot send headers, so the client passes
+    it as ?token= and asks for a new one before reconnecting.
+    """
+    get_object_or_404(Section, pk=section_id)
+    get_object_or_404(Subject, pk=subject_id)
+    return Response({
+        'token': issue_stream_token(request.user, section_id, subject_id),
+        'expires_in': STREAM_TOKEN_MAX_AGE
+    })
+
+async def gradebook_events(request, section_id, subject_id):
+    """
+    Server-Sent Events stream of grade changes for one section and subject.
+    Each `grades` event carries {"subject": id, "grades": [[student_id,
+    assessment_id, score], ...]} with a null score for deleted grades; a
+    `resync` event asks the client to reload. Authenticate with a Bearer
+    header or with ?token= from gradebook_events_token.
+    Requires serving the project through ASGI (config.asgi).
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': 'Method not allowed'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    user = await sync_to_async(authenticate_event_stream)(request, section_id, subject_id)
+    if user is None:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided or are invalid.'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    response = StreamingHttpResponse(
+        event_stream(gradebook_channel(section_id, subject_id)),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def authenticate_event_stream(request, section_id, subject_id):
+    raw_token = request.GET.get('token')
+    if raw_token:
+        user_id = stream_token_user_id(raw_token, section_id, subject_id)
+        if user_id is None:
+            return None
+        return get_user_model().objects.filter(pk=user_id, is_active=True).first()
+
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0] if result else None
+
 @api_view(['PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def assessment_detail(request, pk):
@@ -172,218 +370,722 @@ def assessment_detail(request, pk):
         assessment.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def curve_assessment(request, pk):
+    """
+    Curve every grade of an assessment in one vectorized pass.
+    Body:
+    - method: add (points), scale (target_mean) or zscore (target_mean and
+      optionally target_std); targets are raw scores, not percentages
+    - cap: clamp scores to max_score (default true); with false a curve
+      that would push any score above max_score is rejected
+    - section: only curve the grades of this section
+    - dry_run: only report the resulting distribution and changes
+    Changed grades are written with one bulk upsert.
+    """
+    assessment = get_object_or_404(Assessment, pk=pk)
+    serializer = CurveSerializer(data=request.data, context={'assessment': assessment})
+    serializer.is_valid(raise_exception=True)
+    options = serializer.validated_data
+
+    grades = Grade.objects.filter(assessment=assessment)
+    if options.get('section'):
+        grades = grades.filter(student__section_id=options['section'])
+    student_ids, scores = load_assessment_scores(grades)
+
+    max_score = float(assessment.max_score)
+    curved = curve_scores(
+        scores,
+        options['method'],
+        max_score,
+        points=options['points'],
+        target_mean=options.get('target_mean'),
+        target_std=options.get('target_std'),
+        cap=options['cap']
+    )
+    over = int((curved > max_score).sum())
+    if over:
+        return Response(
+            {'error': f"The curve would raise {over} scores above the assessment's maximum score ({assessment.max_score}); use cap to clamp them"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    changed = scores != curved
+    changes = [
+        {'student_id': int(student_id), 'score': float(old), 'curved_score': float(new)}
+        for student_id, old, new in zip(student_ids[changed], scores[changed], curved[changed])
+    ]
+
+    if not options['dry_run'] and changes:
+        upsert_grades(
+            [
+                Grade(student_id=change['student_id'], assessment=assessment, score=Decimal(f"{change['curved_score']:.2f}"))
+                for change in changes
+            ],
+            {assessment.id: assessment.subject_id},
+            GradeChange.CURVE
+        )
+
+    return Response({
+        'assessment_id': assessment.id,
+        'max_score': max_score,
+        'dry_run': options['dry_run'],
+        'applied': not options['dry_run'] and bool(changes),
+        **curve_summary(scores, curved, max_score),
+        'grades': changes
+    })
+
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
 def bulk_update_grades(request):
+    """
+    Create or update many grades at once.
+    Every row is validated in memory against assessments and students
+    fetched in one query each, valid rows are upserted with
+    bulk_create(update_conflicts=True) in batches inside one transaction,
+    and the response reports the outcome of each row.
+    """
     serializer = BulkGradeUpdateSerializer(data=request.data)
-    if serializer.is_valid():
-        grades_data = serializer.validated_data['grades']
-        updated_grades = []
-        
-        for grade_data in grades_data:
-            student_id = grade_data.get('student_id')
-            assessment_id = grade_data.get('assessment_id')
-            score = grade_data.get('score')
-            
-            if student_id and assessment_id and score is not None:
-                grade, created = Grade.objects.update_or_create(
-                    student_id=student_id,
-                    assessment_id=assessment_id,
-                    defaults={'score': score}
-                )
-                updated_grades.append(grade)
-        
-        return Response({
-            'message': f'{len(updated_grades)} grades updated successfully'
-        })
-    
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    results, rows = [], {}
+    for index, raw_row in enumerate(serializer.validated_data['grades']):
+        row_serializer = BulkGradeRowSerializer(data=raw_row)
+        if not row_serializer.is_valid():
+            results.append({'row': index, 'success': False, 'errors': row_serializer.errors})
+            continue
+        results.append({'row': index, 'success': True, **row_serializer.validated_data})
+        rows[index] = row_serializer.validated_data
+
+    assessments = Assessment.objects.in_bulk({row['assessment_id'] for row in rows.values()})
+    student_ids = set(Student.objects.filter(
+        pk__in={row['student_id'] for row in rows.values()}
+    ).values_list('id', flat=True))
+
+    # Validate against the prefetched rows; the last row for a given
+    # student and assessment wins.
+    latest = {}
+    for index, row in rows.items():
+        assessment = assessments.get(row['assessment_id'])
+        error = None
+        if assessment is None:
+            error = f"Assessment {row['assessment_id']} not found"
+        elif row['student_id'] not in student_ids:
+            error = f"Student {row['student_id']} not found"
+        elif row['score'] > assessment.max_score:
+            error = f"Score ({row['score']}) cannot exceed the assessment's maximum score ({assessment.max_score})"
+
+        if error:
+            results[index].update(success=False, errors=[error])
+            continue
+
+        key = (row['student_id'], row['assessment_id'])
+        if key in latest:
+            results[latest[key]]['superseded_by'] = index
+        latest[key] = index
+
+    grades = [
+        Grade(student_id=student_id, assessment_id=assessment_id, score=rows[index]['score'])
+        for (student_id, assessment_id), index in latest.items()
+    ]
+
+    upsert_grades(grades, {
+        assessment_id: assessment.subject_id for assessment_id, assessment in assessments.items()
+    })
+
+    failed = sum(1 for result in results if not result['success'])
+    return Response({
+        'message': f'{len(grades)} grades updated successfully',
+        'updated': len(grades),
+        'failed': failed,
+        'results': results
+    })
+
+GRADE_ORDERINGS = {
+    'date': ['assessment__date'],
+    '-date': ['-assessment__date'],
+    'student': ['student__last_name', 'student__first_name'],
+    '-student': ['-student__last_name', '-student__first_name'],
+    'updated_at': ['updated_at'],
+    '-updated_at': ['-updated_at'],
+}
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def grade_list_create(request):
+    """
+    List grades one keyset page at a time, or create one or many grades.
+    Query parameters (GET):
+    - student, section, assessment: IDs
+    - type, subject, date_from, date_to: filter by assessment, as for the
+      assessment list
+    - ordering: date, student or updated_at, optionally prefixed with '-'
+    - limit (default 50), cursor: pagination; the response holds results,
+      next_cursor and next
+    """
     if request.method == 'GET':
-        grades = Grade.objects.all()
-        student_id = request.GET.get('student')
-        subject_id = request.GET.get('subject')
-        
-        if student_id:
-            grades = grades.filter(student_id=student_id)
-        if subject_id:
-            grades = grades.filter(assessment__subject_id=subject_id)
-        
-        serializer = GradeSerializer(grades, many=True)
-        return Response(serializer.data)
+        params = request.query_params
+        ordering = params.get('ordering', '-updated_at')
+        if ordering not in GRADE_ORDERINGS:
+            raise ValidationError({'ordering': f"Must be one of: {', '.join(GRADE_ORDERINGS)}"})
+
+        grades = Grade.objects.select_related('student', 'assessment')
+        for param, lookup in (('student', 'student_id'), ('section', 'student__section_id'), ('assessment', 'assessment_id')):
+            value = query_int(params, param)
+            if value is not None:
+                grades = grades.filter(**{lookup: value})
+        if any(params.get(param) for param in ('type', 'subject', 'date_from', 'date_to')):
+            grades = grades.filter(assessment__in=filter_assessments(params).values('pk'))
+
+        # Every page is one query: related rows come from the same join.
+        paginator = KeysetPagination(GRADE_ORDERINGS[ordering], opt_in=False)
+        page = paginator.paginate_queryset(grades, request)
+        serializer = GradeSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     
     elif request.method == 'POST':
-        serializer = GradeSerializer(data=request.data)
+        # A list of grades is validated and inserted as one batch.
+        serializer = GradeSerializer(data=request.data, many=isinstance(request.data, list))
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+def parse_moment(value):
+    """Aware datetime from an ISO 8601 datetime, or the end of an ISO date."""
+    try:
+        day = parse_date(value)
+        moment = datetime.combine(day, time.max) if day else parse_datetime(value)
+    except ValueError:
+        return None
+    if moment is None:
+        return None
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+def filter_grade_changes(changes, params):
+    """Narrow grade history by student, assessment, subject and/or section."""
+    for param, lookup in (
+        ('student', 'student_id'),
+        ('assessment', 'assessment_id'),
+        ('subject', 'assessment__subject_id'),
+        ('section', 'student__section_id'),
+    ):
+        value = query_int(params, param)
+        if value is not None:
+            changes = changes.filter(**{lookup: value})
+    return changes
+
+GRADE_CHANGE_FIELDS = ('id', 'student_id', 'assessment_id', 'score', 'source', 'changed_at')
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def student_grades(request, student_id):
-    """Get final grades for all subjects of a student"""
-    try:
-        # Get all enrollments for the student
-        enrollments = Enrollment.objects.filter(student_id=student_id).select_related('subject')
-        
-        grades_data = []
-        for enrollment in enrollments:
-            final_grade = calculate_final_grade(student_id, enrollment.subject.id)
-            
-            grades_data.append({
-                'subject_code': enrollment.subject.code,
-                'subject_name': enrollment.subject.name,
-                'final_grade': round(final_grade, 2),
-                'status': get_grade_status(final_grade)
-            })
-        
-        return Response(grades_data)
-        
-    except Exception as e:
+def grade_history(request):
+    """
+    Grade change log, newest first.
+    Query parameters:
+    - student, assessment, subject, section: at least one is required
+    - since, until: ISO 8601 bounds on changed_at
+    - limit, cursor: keyset pagination, always applied (default 50 per page)
+    """
+    params = request.query_params
+    if not any(params.get(key) for key in ('student', 'assessment', 'subject', 'section')):
         return Response(
-            {'error': str(e)}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {'error': 'Filter by student, assessment, subject or section'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    changes = filter_grade_changes(GradeChange.objects.all(), params)
+    for key, lookup in (('since', 'changed_at__gte'), ('until', 'changed_at__lte')):
+        if params.get(key):
+            moment = parse_moment(params[key])
+            if moment is None:
+                return Response({'error': f'{key} must be an ISO 8601 date or datetime'}, status=status.HTTP_400_BAD_REQUEST)
+            changes = changes.filter(**{lookup: moment})
+
+    paginator = KeysetPagination(['-changed_at'], opt_in=False)
+    page = paginator.paginate_queryset(changes.only(*GRADE_CHANGE_FIELDS), request)
+    return paginator.get_paginated_response([
+        {field: getattr(change, field) for field in GRADE_CHANGE_FIELDS} for change in page
+    ])
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def grades_as_of(request):
+    """
+    Grades as they stood at a point in time, read from the grade history.
+    Query parameters:
+    - at: ISO 8601 datetime (a bare date means the end of that day)
+    - student, assessment, subject, section: at least one is required
+    """
+    params = request.query_params
+    moment = parse_moment(params.get('at', ''))
+    if moment is None:
+        return Response({'error': 'at must be an ISO 8601 date or datetime'}, status=status.HTTP_400_BAD_REQUEST)
+    if not any(params.get(key) for key in ('student', 'assessment', 'subject', 'section')):
+        return Response(
+            {'error': 'Filter by student, assessment, subject or section'},
+            status=status.HTTP_400_BAD_REQUEST
         )
 
+    changes = filter_grade_changes(GradeChange.objects.as_of(moment), params).filter(score__isnull=False)
+    return Response({
+        'as_of': moment,
+        'grades': list(changes.order_by('assessment_id', 'student_id').values(
+            'student_id', 'assessment_id', 'score', 'changed_at'
+        ))
+    })
+
+def student_final_grades(student_ids):
+    """
+    Per-subject final grades of the given students, keyed by student ID.
+    One query regardless of the number of students or subjects: active
+    enrollments joined with their subject and the stored FinalGrade row,
+    which is weighted with the subject's GradeWeight.
+    """
+    final_grades = FinalGrade.objects.filter(
+        student_id=OuterRef('student_id'),
+        subject_id=OuterRef('subject_id')
+    )
+    enrollments = Enrollment.objects.filter(
+        student_id__in=student_ids,
+        is_active=True
+    ).select_related('subject').annotate(
+        final_grade_id=Subquery(final_grades.values('id')[:1]),
+        final_grade=Subquery(final_grades.values('final_grade')[:1])
+    ).order_by('student_id', 'subject__year_level', 'subject__code')
+
+    grades_data = {student_id: [] for student_id in student_ids}
+    for enrollment in enrollments:
+        subject = enrollment.subject
+        final_grade, status_msg = final_grade_summary(
+            enrollment.final_grade,
+            graded=enrollment.final_grade_id is not None
+        )
+
+        grades_data[enrollment.student_id].append({
+            'subject_code': subject.code,
+            'subject_name': subject.name,
+            'final_grade': final_grade,
+            'status': status_msg
+        })
+
+    return grades_data
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_student_grades(request, student_id):
+    student = get_object_or_404(Student, pk=student_id)
+    return Response(student_final_grades([student.id])[student.id], status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_many_student_grades(request):
+    """
+    Per-subject final grades of several students in one call.
+    Query parameters:
+    - students: comma-separated student primary keys, e.g. ?students=1,2,3
+    """
     try:
-        # Verify the student exists
-        student = get_object_or_404(Student, pk=student_id)
-        
-        # Get all active enrollments for this student
-        enrollments = Enrollment.objects.filter(
-            student=student,
-            is_active=True
-        ).select_related('subject')
-        
-        if not enrollments.exists():
-            return Response([], status=status.HTTP_200_OK)
-        
-        # Calculate final grade for each subject
-        grades_data = []
-        for enrollment in enrollments:
-            try:
-                subject = enrollment.subject
-                if not subject:
-                    continue
-                
-                # Get all grades for this student in this subject
-                grades = Grade.objects.filter(
-                    student=student,
-                    assessment__subject=subject
-                ).select_related('assessment')
-                
-                if not grades.exists():
-                    # Add subject with no grades
-                    grades_data.append({
-                        'subject_code': subject.code,
-                        'subject_name': subject.name,
-                        'final_grade': 0,
-                        'status': 'No grades yet'
-                    })
-                    continue
-                
-                # Calculate weighted average
-                total_weighted_score = 0
-                total_weight = 0
-                
-                for grade in grades:
-                    try:
-                        assessment = grade.assessment
-                        if not assessment:
-                            continue
-                            
-                        weight = 0
-                        
-                        # Determine weight based on assessment type
-                        if assessment.assessment_type == 'activity':
-                            weight = 0.3  # 30% weight for activities
-                        elif assessment.assessment_type == 'quiz':
-                            weight = 0.3  # 30% weight for quizzes
-                        elif assessment.assessment_type == 'exam':
-                            weight = 0.4  # 40% weight for exams
-                        
-                        # Skip if weight is 0 or max_score is 0 to avoid division by zero
-                        if weight == 0 or not assessment.max_score:
-                            continue
-                            
-                        # Calculate weighted score (normalized to percentage)
-                        normalized_score = (float(grade.score) / float(assessment.max_score)) * 100
-                        total_weighted_score += normalized_score * weight
-                        total_weight += weight
-                        
-                    except (AttributeError, TypeError, ValueError) as e:
-                        print(f"Error processing grade {grade.id}: {str(e)}")
-                        continue
-                
-                # Calculate final grade (ensure we don't divide by zero)
-                if total_weight > 0:
-                    final_grade = round(total_weighted_score / total_weight, 2)
-                    status_msg = get_grade_status(final_grade, 100)
-                else:
-                    final_grade = 0
-                    status_msg = 'No valid grades'
-                
-                # Add to results
-                grades_data.append({
-                    'subject_code': subject.code,
-                    'subject_name': subject.name,
-                    'final_grade': final_grade,
-                    'status': status_msg
-                })
-                
-            except Exception as e:
-                print(f"Error processing enrollment {enrollment.id}: {str(e)}")
-                continue
-        
-        return Response(grades_data, status=status.HTTP_200_OK)
-        
-    except Student.DoesNotExist:
+        requested = [int(pk) for pk in request.query_params.get('students', '').split(',') if pk.strip()]
+    except ValueError:
+        return Response({'error': 'students must be a comma-separated list of IDs'}, status=status.HTTP_400_BAD_REQUEST)
+    if not requested:
+        return Response({'error': 'students is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    students = Student.objects.filter(pk__in=requested).order_by('last_name', 'first_name')
+    students = list(students.only('id', 'student_id', 'first_name', 'last_name'))
+    grades_data = student_final_grades([student.id for student in students])
+
+    return Response([
+        {
+            'student_id': student.id,
+            'student_number': student.student_id,
+            'student_name': student.full_name,
+            'grades': grades_data[student.id]
+        }
+        for student in students
+    ])
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def student_transcript(request, student_id):
+    """
+    A student's active subjects with final grade, pass status and units,
+    and the units-weighted GPA over graded subjects (0-100 scale).
+    """
+    student = get_object_or_404(Student, pk=student_id)
+    return Response({
+        'student_id': student.id,
+        'student_number': student.student_id,
+        'student_name': student.full_name,
+        **get_transcripts([student.id])[student.id]
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def section_transcripts(request, section_id):
+    """Transcripts of every student of a section, cached per student."""
+    section = get_object_or_404(Section, pk=section_id)
+    students = list(Student.objects.filter(section=section).order_by('last_name', 'first_name').only(
+        'id', 'student_id', 'first_name', 'last_name'
+    ))
+    transcripts = get_transcripts([student.id for student in students])
+    return Response([
+        {
+            'student_id': student.id,
+            'student_number': student.student_id,
+            'student_name': student.full_name,
+            **transcripts[student.id]
+        }
+        for student in students
+    ])
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def section_final_grades(request, section_id):
+    """
+    Weighted final grades for every active student x subject enrollment in
+    a section, computed with one grouped aggregation over the section's
+    grades. Optional ?subject=<id> limits the result to one subject.
+    """
+    section = get_object_or_404(Section, pk=section_id)
+    subject_id = query_int(request.query_params, 'subject')
+
+    enrollments = Enrollment.objects.filter(
+        student__section=section,
+        is_active=True
+    ).select_related('student', 'subject').order_by(
+        'subject__code', 'student__last_name', 'student__first_name'
+    )
+    grades = Grade.objects.filter(student__section=section)
+    if subject_id:
+        enrollments = enrollments.filter(subject_id=subject_id)
+        grades = grades.filter(assessment__subject_id=subject_id)
+    enrollments = list(enrollments)
+
+    totals = defaultdict(dict)
+    for row in grades.category_totals():
+        key = (row['student_id'], row['assessment__subject_id'])
+        totals[key][row['assessment__assessment_type']] = (row['score_total'], row['max_total'])
+
+    subject_ids = {enrollment.subject_id for enrollment in enrollments}
+    weights = {
+        weight.subject_id: weight
+        for weight in GradeWeight.objects.filter(subject_id__in=subject_ids)
+    }
+
+    results = []
+    for enrollment in enrollments:
+        student, subject = enrollment.student, enrollment.subject
+        student_totals = totals.get((student.id, subject.id))
+        final_grade, status_msg = final_grade_summary(
+            weighted_final_grade(student_totals or {}, subject_weights(weights.get(subject.id))),
+            graded=student_totals is not None
+        )
+
+        results.append({
+            'student_id': student.id,
+            'student_name': student.full_name,
+            'subject_id': subject.id,
+            'subject_code': subject.code,
+            'subject_name': subject.name,
+            'final_grade': final_grade,
+            'status': status_msg
+        })
+
+    return Response(results)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def subject_statistics(request, subject_id):
+    """
+    Score distribution of a subject's grades, overall, per assessment_type
+    and per assessment, on the percentage scale.
+    Query parameters:
+    - section: limit to students of this section
+    - bins: number of histogram bins between 0 and 100 (default 10)
+    """
+    subject = get_object_or_404(Subject, pk=subject_id)
+    section_id = query_int(request.query_params, 'section')
+    bins = query_int(request.query_params, 'bins', DEFAULT_BINS, min_value=1, max_value=100)
+
+    grades = Grade.objects.filter(assessment__subject=subject)
+    if section_id:
+        grades = grades.filter(student__section_id=section_id)
+
+    return Response({
+        'subject_id': subject.id,
+        'section_id': section_id,
+        **assessment_statistics(grades, Assessment.objects.filter(subject=subject), bins)
+    })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def simulate_weights_view(request, subject_id):
+    """
+    What-if comparison of a subject's final grades under candidate grade
+    weights, computed from the stored category totals in one vectorized
+    pass. Nothing is saved; use update_weights to apply an option.
+    Body:
+    - weights: list of {activity_weight, quiz_weight, exam_weight}
+    - section: optional, limit to students of this section
+    - include_students: also return every student's simulated grades
+    """
+    subject = get_object_or_404(Subject, pk=subject_id)
+    serializer = WeightSimulationSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    final_grades = FinalGrade.objects.filter(subject=subject).filter(Exists(Enrollment.objects.filter(
+        student_id=OuterRef('student_id'),
+        subject_id=OuterRef('subject_id'),
+        is_active=True
+    )))
+    if data.get('section'):
+        final_grades = final_grades.filter(student__section_id=data['section'])
+
+    current_weights = subject_weights(GradeWeight.objects.filter(subject=subject).first())
+    return Response({
+        'subject_id': subject.id,
+        'section_id': data.get('section'),
+        'current_weights': {assessment_type: float(weight) for assessment_type, weight in current_weights.items()},
+        **simulate_weights(final_grades.order_by('student_id'), data['weights'], data['include_students'])
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def at_risk_students(request):
+    """
+    Students whose weighted final grade is below a threshold in at least
+    one active subject, lowest first, with those subjects.
+    Answered in one query over the stored per-subject final grades.
+    Query parameters:
+    - threshold: percentage, default the passing grade (75)
+    - section, year_level, subject: limit the students or subjects checked
+    """
+    params = request.query_params
+    try:
+        threshold = Decimal(params.get('threshold', PASSING_GRADE))
+    except InvalidOperation:
+        threshold = None
+    if threshold is None or not threshold.is_finite() or not 0 <= threshold <= 100:
+        return Response({'error': 'threshold must be a number between 0 and 100'}, status=status.HTTP_400_BAD_REQUEST)
+
+    final_grades = FinalGrade.objects.filter(final_grade__lt=threshold).filter(Exists(Enrollment.objects.filter(
+        student_id=OuterRef('student_id'),
+        subject_id=OuterRef('subject_id'),
+        is_active=True
+    )))
+    for param, lookup in (
+        ('section', 'student__section_id'),
+        ('year_level', 'student__section__year_level'),
+        ('subject', 'subject_id'),
+    ):
+        value = query_int(params, param)
+        if value is not None:
+            final_grades = final_grades.filter(**{lookup: value})
+
+    rows = final_grades.values(
+        'student_id', 'student__student_id', 'student__first_name', 'student__last_name',
+        'student__section_id', 'student__section__name', 'student__section__year_level',
+        'subject_id', 'subject__code', 'subject__name', 'final_grade'
+    ).order_by('student_id', 'final_grade')
+
+    students = {}
+    for row in rows:
+        student = students.setdefault(row['student_id'], {
+            'student_id': row['student_id'],
+            'student_number': row['student__student_id'],
+            'student_name': f"{row['student__first_name']} {row['student__last_name']}",
+            'section_id': row['student__section_id'],
+            'section': row['student__section__name'],
+            'year_level': row['student__section__year_level'],
+            'lowest_grade': float(row['final_grade']),
+            'subjects': []
+        })
+        student['subjects'].append({
+            'subject_id': row['subject_id'],
+            'subject_code': row['subject__code'],
+            'subject_name': row['subject__name'],
+            'final_grade': float(row['final_grade']),
+            'status': get_grade_status(row['final_grade'], 100)
+        })
+
+    results = sorted(students.values(), key=lambda student: (student['lowest_grade'], student['student_name']))
+    return Response({'threshold': float(threshold), 'count': len(results), 'results': results})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def grade_analytics(request):
+    """
+    Grade statistics (count, mean, std, min, max, pass rate, on the
+    percentage scale) rolled up from the precomputed per-section,
+    per-assessment aggregates, so raw grades are never scanned.
+    Query parameters:
+    - group_by: comma separated subset of year_level, section, subject,
+      assessment_type and assessment (default subject); empty for totals
+    - year_level, section, subject, assessment_type: filters
+    """
+    params = request.query_params
+    group_by = list(dict.fromkeys(name for name in params.get('group_by', 'subject').split(',') if name))
+    unknown = [name for name in group_by if name not in ANALYTICS_DIMENSIONS]
+    if unknown:
         return Response(
-            {'error': 'Student not found'}, 
-            status=status.HTTP_404_NOT_FOUND
+            {'error': f"group_by must be a subset of: {', '.join(ANALYTICS_DIMENSIONS)}"},
+            status=status.HTTP_400_BAD_REQUEST
         )
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
+
+    aggregates = GradeAggregate.objects.all()
+    for param, lookup in (('year_level', 'year_level'), ('section', 'section_id'), ('subject', 'subject_id')):
+        value = query_int(params, param)
+        if value is not None:
+            aggregates = aggregates.filter(**{lookup: value})
+    if params.get('assessment_type'):
+        aggregates = aggregates.filter(assessment_type=params['assessment_type'])
+
+    return Response({'group_by': group_by, 'results': roll_up(aggregates, group_by)})
+
+RANKING_SCOPES = {
+    'section': 'student__section_id',
+    'year_level': 'student__section__year_level',
+}
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def class_rankings(request, subject_id):
+    """
+    Rank, dense rank and percentile of students' weighted final grades in
+    a subject, computed in the database with window functions over the
+    stored final grades.
+    Query parameters:
+    - scope: section (default) ranks within each section, year_level
+      within each year level
+    - section, year_level: limit the cohort
+    - top: only return students ranked N or better in their partition
+    """
+    subject = get_object_or_404(Subject, pk=subject_id)
+    params = request.query_params
+
+    scope = params.get('scope', 'section')
+    if scope not in RANKING_SCOPES:
+        return Response({'error': f"scope must be one of: {', '.join(RANKING_SCOPES)}"}, status=status.HTTP_400_BAD_REQUEST)
+    partition = RANKING_SCOPES[scope]
+
+    top = query_int(params, 'top', min_value=1)
+
+    final_grades = FinalGrade.objects.filter(
+        subject=subject,
+        final_grade__isnull=False,
+        student__section__isnull=False
+    ).filter(Exists(Enrollment.objects.filter(
+        student_id=OuterRef('student_id'),
+        subject_id=OuterRef('subject_id'),
+        is_active=True
+    )))
+    for param, lookup in (('section', 'student__section_id'), ('year_level', 'student__section__year_level')):
+        value = query_int(params, param)
+        if value is not None:
+            final_grades = final_grades.filter(**{lookup: value})
+
+    window = {'partition_by': [F(partition)], 'order_by': F('final_grade').desc()}
+    rankings = final_grades.annotate(
+        rank=Window(Rank(), **window),
+        dense_rank=Window(DenseRank(), **window),
+        percent_rank=Window(PercentRank(), **window)
+    )
+    if top is not None:
+        rankings = rankings.filter(rank__lte=top)
+
+    rows = rankings.values(
+        'student_id',
+        'student__student_id',
+        'student__first_name',
+        'student__last_name',
+        'student__section_id',
+        'student__section__name',
+        'student__section__year_level',
+        'final_grade',
+        'rank',
+        'dense_rank',
+        'percent_rank'
+    ).order_by(partition, 'rank', 'student__last_name', 'student__first_name')
+
+    return Response({
+        'subject_id': subject.id,
+        'scope': scope,
+        'results': [
+            {
+                'student_id': row['student_id'],
+                'student_number': row['student__student_id'],
+                'student_name': f"{row['student__first_name']} {row['student__last_name']}",
+                'section_id': row['student__section_id'],
+                'section': row['student__section__name'],
+                'year_level': row['student__section__year_level'],
+                'final_grade': float(row['final_grade']),
+                'rank': row['rank'],
+                'dense_rank': row['dense_rank'],
+                'percentile': round((1 - row['percent_rank']) * 100, 2)
+            }
+            for row in rows
+        ]
+    })
+
+def _export_response(request, grades, filename, file_format):
+    if file_format not in EXPORT_FORMATS:
         return Response(
-            {'error': 'An error occurred while processing grades'}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {'error': f"file_format must be one of: {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
         )
 
-def get_grade_status(score, max_score=100):
+    writer, content_type, extension = EXPORT_FORMATS[file_format]
+    chunks = writer(export_rows(grades))
+    if isinstance(request._request, ASGIRequest):
+        chunks = iterate_async(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_grades(request, section_id):
     """
-    Determine the grade status based on score and max_score.
-    If max_score is 100, it's already a percentage.
+    Stream every grade of a section as CSV (default) or XLSX.
+    Query parameters:
+    - file_format: csv or xlsx
+    - subject: limit the export to one subject ID
     """
-    try:
-        if max_score != 100:
-            percentage = (float(score) / float(max_score)) * 100
-        else:
-            percentage = float(score)
-            
-        if percentage >= 90:
-            return 'Excellent'
-        elif percentage >= 80:
-            return 'Good'
-        elif percentage >= 75:
-            return 'Passing'
-        else:
-            return 'Needs Improvement'
-    except (TypeError, ValueError, ZeroDivisionError):
-        return 'N/A'
-    return 'Failed'
+    section = get_object_or_404(Section, pk=section_id)
+    grades = section_grades(section.id, query_int(request.query_params, 'subject'))
+    return _export_response(
+        request,
+        grades,
+        f'grades-year{section.year_level}-section{section.name}',
+        request.query_params.get('file_format', 'csv')
+    )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_year_level_grades(request, year_level):
+    """Stream every grade of a year level, with the same options as export_grades."""
+    grades = year_level_grades(year_level, query_int(request.query_params, 'subject'))
+    return _export_response(
+        request,
+        grades,
+        f'grades-year{year_level}',
+        request.query_params.get('file_format', 'csv')
+    )
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def update_grade(request):
-    """Update a student's grade for an assessment"""
+    """
+    Update a student's grade for an assessment.
+    The response also carries the student's recomputed gradebook row
+    (scores, total, average and weighted final grade) so the client can
+    patch its table in place instead of reloading the gradebook.
+    """
     try:
         data = request.data
         student_id = data.get('student')
@@ -397,92 +1099,194 @@ def update_grade(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get or create grade
-        grade, created = Grade.objects.update_or_create(
-            student_id=student_id,
-            assessment_id=assessment_id,
-            defaults={'score': score}
+        try:
+            grade = Grade.objects.filter(student_id=student_id, assessment_id=assessment_id).first()
+        except (TypeError, ValueError):
+            # Malformed ids; the serializer reports them below.
+            grade = None
+
+        # Same checks as the other write paths: existing student and
+        # assessment, and a score between 0 and the assessment's max_score.
+        serializer = GradeSerializer(
+            grade,
+            data={'student': student_id, 'assessment': assessment_id, 'score': score},
+            partial=grade is not None
         )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        grade = serializer.save()
 
-        serializer = GradeSerializer(grade)
-        return Response(serializer.data)
+        return Response({
+            **serializer.data,
+            'gradebook_row': build_student_row(grade.student, grade.assessment.subject_id)
+        })
 
+    except IntegrityError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response(
             {'error': str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
-def calculate_final_grade(student_id, subject_id):
-    subject = Subject.objects.get(id=subject_id)
-    weights = subject.grade_weights
-    
-    # Get grades by category
-    activities = Grade.objects.filter(
-        student_id=student_id,
-        assessment__subject_id=subject_id,
-        assessment__assessment_type='activity'
-    )
-    quizzes = Grade.objects.filter(
-        student_id=student_id,
-        assessment__subject_id=subject_id,
-        assessment__assessment_type='quiz'
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_grades(request):
+    """
+    Upload a grade CSV and preview, in the background, what importing it
+    would change. The file needs Student ID, Assessment and Score columns
+    (the grade export works as is); assessments are looked up by name
+    within the row's Subject Code column or, without one, the ?subject=
+    subject.
+    Nothing is written: poll jobs/<job_id>/ until it succeeds, when its
+    result holds counts and samples of new, changed, unchanged and invalid
+    rows, then apply it with POST import/<job_id>/apply/.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'Upload the CSV as "file"'}, status=status.HTTP_400_BAD_REQUEST)
+
+    subject_code = None
+    subject_id = query_int(request.query_params, 'subject') or query_int(request.data, 'subject')
+    if subject_id:
+        subject_code = get_object_or_404(Subject, pk=subject_id).code
+
+    try:
+        check_format(upload)
+    except ImportFormatError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        job = Job(
+            kind=Job.GRADE_IMPORT,
+            params={'subject': subject_code, 'filename': upload.name, 'stage': PREVIEW},
+            created_by=request.user
+        )
+        job.file.save(upload.name, upload, save=False)
+        job.save()
+        submit_job(job, preview_import)
+    return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def apply_import(request, job_id):
+    """Apply a previewed grade import in the background; poll jobs/<job_id>/."""
+    with transaction.atomic():
+        job = get_object_or_404(Job.objects.select_for_update(), pk=job_id, kind=Job.GRADE_IMPORT)
+        if job.params.get('stage') != PREVIEW:
+            return Response({'error': 'This import has already been applied'}, status=status.HTTP_409_CONFLICT)
+        if job.status != Job.SUCCEEDED:
+            return Response(
+                {'error': f'The preview of this import is {job.status}'},
+                status=status.HTTP_409_CONFLICT
+            )
+        job.params['stage'] = APPLY
+        job.processed = 0
+        job.save(update_fields=['params', 'processed'])
+        submit_job(job, run_import)
+    return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_status(request, job_id):
+    """Status, progress and result of a background job."""
+    job = get_object_or_404(Job, pk=job_id)
+    return Response(JobSerializer(job).data)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def generate_report_cards_view(request):
+    """
+    Start a background job rendering report cards into a zip archive.
+    Body:
+    - section or year_level: limit to these students (everyone otherwise)
+    - formats: list of html and/or csv (default html, printable as is)
+    Poll jobs/<job_id>/ and fetch the archive from jobs/<job_id>/download/.
+    """
+    serializer = ReportCardRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    with transaction.atomic():
+        job = Job.objects.create(
+            kind=Job.REPORT_CARDS,
+            params=serializer.validated_data,
+            created_by=request.user
+        )
+        submit_job(job, run_report_cards)
+    return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_job_file(request, job_id):
+    """The archive produced by a finished report card job."""
+    job = get_object_or_404(Job, pk=job_id, kind=Job.REPORT_CARDS)
+    if job.status != Job.SUCCEEDED or not job.file:
+        return Response({'error': f'This job is {job.status}'}, status=status.HTTP_409_CONFLICT)
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=os.path.basename(job.file.name))
+
+YEAR_LEVELS = range(1, 5)  # Assuming 4 year levels
+
+def compute_dashboard_stats():
+    """Dashboard statistics from four grouped queries."""
+    sections = dict(
+        Section.objects.values_list('year_level').annotate(count=Count('id')).order_by()
     )
-    exams = Grade.objects.filter(
-        student_id=student_id,
-        assessment__subject_id=subject_id,
-        assessment__assessment_type='exam'
+    students = dict(
+        Student.objects.values_list('section__year_level').annotate(count=Count('id')).order_by()
     )
-    
-    # Calculate category averages
-    activity_avg = calculate_category_average(activities) * (weights.activity_weight / 100)
-    quiz_avg = calculate_category_average(quizzes) * (weights.quiz_weight / 100)
-    exam_avg = calculate_category_average(exams) * (weights.exam_weight / 100)
-    
-    return activity_avg + quiz_avg + exam_avg
+    subjects = {
+        row['year_level']: (row['count'], row['units'])
+        for row in Subject.objects.values('year_level').annotate(
+            count=Count('id'),
+            units=Sum('units')
+        ).order_by()
+    }
+
+    year_level_stats = []
+    subject_stats = []
+    for year in YEAR_LEVELS:
+        section_count = sections.get(year, 0)
+        student_count = students.get(year, 0)
+        subject_count, units = subjects.get(year, (0, 0))
+
+        year_level_stats.append({
+            'level': year,
+            'sectionCount': section_count,
+            'totalStudents': student_count,
+            'averagePerSection': round(student_count / section_count if section_count > 0 else 0, 1)
+        })
+        subject_stats.append({
+            'level': year,
+            'totalSubjects': subject_count,
+            'totalUnits': units or 0
+        })
+
+    return {
+        'total_students': sum(students.values()),
+        'total_subjects': sum(count for count, _ in subjects.values()),
+        'total_sections': sum(sections.values()),
+        'total_enrollments': Enrollment.objects.count(),
+        'year_level_stats': year_level_stats,
+        'subject_stats': subject_stats
+    }
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_dashboard_stats(request):
-    """Get statistics for dashboard"""
+    """
+    Get statistics for dashboard.
+    Served from cache; writes to students, sections, subjects and
+    enrollments invalidate it, and a stale value is refreshed in the
+    background.
+    """
     try:
-        # Basic stats
-        basic_stats = {
-            'total_students': Student.objects.count(),
-            'total_subjects': Subject.objects.count(),
-            'total_sections': Section.objects.count(),
-            'total_enrollments': Enrollment.objects.count(),
-        }
-
-        # Year level statistics
-        year_level_stats = []
-        for year in range(1, 5):  # Assuming 4 year levels
-            sections = Section.objects.filter(year_level=year)
-            students = Student.objects.filter(section__year_level=year)
-            
-            year_level_stats.append({
-                'level': year,
-                'sectionCount': sections.count(),
-                'totalStudents': students.count(),
-                'averagePerSection': round(students.count() / sections.count() if sections.count() > 0 else 0, 1)
-            })
-
-        # Subject distribution
-        subject_stats = []
-        for year in range(1, 5):
-            subjects = Subject.objects.filter(year_level=year)
-            subject_stats.append({
-                'level': year,
-                'totalSubjects': subjects.count(),
-                'totalUnits': subjects.aggregate(Sum('units'))['units__sum'] or 0
-            })
+        return Response(stale_while_revalidate(
+            DASHBOARD_STATS_KEY,
+            compute_dashboard_stats,
+            DASHBOARD_STATS_FRESH_FOR,
+            DASHBOARD_STATS_STALE_FOR
+        ))
 
-        return Response({
-            **basic_stats,
-            'year_level_stats': year_level_stats,
-            'subject_stats': subject_stats
-        })
-        
     except Exception as e:
         return Response(
             {'error': str(e)}, 
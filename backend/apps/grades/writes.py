@@ -0,0 +1,44 @@
+# backend/apps/grades/writes.py
+from collections import defaultdict
+
+from django.db import transaction
+
+from .events import publish_grade_changes
+from .models import FinalGrade, Grade, GradeAggregate, GradeChange
+
+BULK_UPSERT_BATCH_SIZE = 500
+
+
+def upsert_grades(grades, subject_ids, source=GradeChange.BULK):
+    """
+    Create or update many grades in one transaction.
+    grades are unsaved Grade instances, at most one per student and
+    assessment; subject_ids maps each assessment_id to its subject_id.
+    bulk_create skips model signals, so the grade history, final grades,
+    analytics aggregates and live gradebooks are updated here once per
+    batch instead.
+    """
+    grades = list(grades)
+    affected = defaultdict(list)
+    for grade in grades:
+        affected[subject_ids[grade.assessment_id]].append(grade)
+
+    with transaction.atomic():
+        Grade.objects.bulk_create(
+            grades,
+            batch_size=BULK_UPSERT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['student', 'assessment'],
+            update_fields=['score', 'updated_at']
+        )
+        GradeChange.objects.record(
+            [(grade.student_id, grade.assessment_id, grade.score) for grade in grades],
+            source
+        )
+        for subject_id, subject_grades in affected.items():
+            FinalGrade.objects.refresh(subject_id, {grade.student_id for grade in subject_grades})
+            publish_grade_changes(subject_id, [
+                (grade.student_id, grade.assessment_id, grade.score) for grade in subject_grades
+            ])
+        GradeAggregate.objects.refresh({grade.assessment_id for grade in grades})
+    return grades
@@ -8,6 +8,8 @@ from django.db.models import Q
 import logging
 from .models import Student, Section
 from .serializers import StudentSerializer, StudentCreateSerializer, BulkStudentSerializer, SectionSerializer
+from apps.grades.caching import invalidate_dashboard_stats
+from apps.grades.models import Grade, GradeAggregate
 
 logger = logging.getLogger(__name__)
 
@@ -146,6 +148,8 @@ def bulk_register_students(request):
     serializer = BulkStudentSerializer(data=request.data)
     if serializer.is_valid():
         students = serializer.save()
+        # bulk_create sends no model signals
+        invalidate_dashboard_stats()
         return Response({
             'message': f'{len(students)} students registered successfully',
             'students': StudentSerializer(students, many=True).data
@@ -243,9 +247,15 @@ def bulk_assign_section(request):
         section = get_object_or_404(Section, pk=section_id)
         
         # Update all students in the list
-        updated_count = Student.objects.filter(
-            id__in=student_ids
-        ).update(section=section)
+        students = Student.objects.filter(id__in=student_ids)
+        section_ids = set(students.exclude(section_id=None).values_list('section_id', flat=True)) | {section.id}
+        updated_count = students.update(section=section)
+        invalidate_dashboard_stats()
+        # update() sends no signals; regroup the moved students' grades in
+        # their old sections and the new one.
+        GradeAggregate.objects.refresh(set(
+            Grade.objects.filter(student_id__in=student_ids).values_list('assessment_id', flat=True)
+        ), section_ids)
 
         return Response({
             'message': f'Successfully assigned {updated_count} students to section {section.name}'
@@ -10,6 +10,7 @@ from django.shortcuts import get_object_or_404
 from django.db import transaction
 from rest_framework.exceptions import ValidationError
 from apps.students.models import Student
+from apps.grades.caching import invalidate_dashboard_stats, invalidate_transcripts
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
@@ -306,6 +307,11 @@ def unenroll_student(request, pk):
             id=pk, 
             is_active=True
         ).update(is_active=False)
+        if updated:
+            # update() sends no model signals
+            student_id = Enrollment.objects.filter(id=pk).values_list('student_id', flat=True).first()
+            invalidate_transcripts([student_id])
+            invalidate_dashboard_stats()
         
         if updated == 0:
             print(f"No active enrollment found with id: {pk}")
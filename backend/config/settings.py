@@ -191,12 +191,27 @@ TEMPLATES = [
 DATABASES = {
     'default': dj_database_url.config(
         default=os.getenv('DATABASE_URL', 'sqlite:///' + str(BASE_DIR / 'db.sqlite3')),
-        conn_max_age=600,
+        # Served through ASGI: persistent connections are per thread and
+        # would pile up across sync_to_async threads, so close per request.
+        conn_max_age=0,
         conn_health_checks=True,
         ssl_require=not DEBUG
     )
 }
 
+# Cache (per-process memory by default; use a shared backend such as
+# django.core.cache.backends.db.DatabaseCache when running several workers)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'studentms'),
+    }
+}
+
+# Broker for live gradebook events (see apps.grades.events). The default
+# only reaches clients connected to the same process.
+GRADE_EVENTS_BROKER = os.getenv('GRADE_EVENTS_BROKER', 'apps.grades.events.InProcessBroker')
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
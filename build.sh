@@ -9,6 +9,8 @@ pip install -r requirements.txt
 echo "=== Applying database migrations ==="
 python manage.py makemigrations || echo "No new migrations to apply"
 python manage.py migrate
+python manage.py rebuild_final_grades
+python manage.py rebuild_grade_aggregates
 
 echo "=== Collecting static files ==="
 python manage.py collectstatic --noinput